@@ -0,0 +1,283 @@
+"""Binary archive of gauged sections, readable without loading it.
+
+Layout (little-endian, every table 8-byte aligned):
+
+    header     HEADER_DTYPE, one record
+    segments   SEGMENT_DTYPE, in the order sections were written
+    sections   SECTION_DTYPE, sorted by station then date
+    stations   STATION_DTYPE, sorted by name; each covers a contiguous run of sections
+
+Archive memory-maps each table, so selecting a station and date range is a
+binary search plus a slice of the on-disk records.
+
+    python archive.py build gaugings.csv -o gaugings.fma
+    python archive.py query gaugings.fma --station S1 --from 2024-01-01 --to 2025-01-01
+"""
+import argparse
+import os
+import sys
+from itertools import groupby
+
+import numpy as np
+
+from batch import METHODS, compute_chunk, read_records, resolve_method, section_key, validate_chunk
+
+MAGIC = b"FMARCH\x00\x01"
+VERSION = 1
+METHOD_CODES = {name: code for code, name in enumerate(METHODS)}
+NAME_BYTES = 32
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u8"),
+        ("n_segments", "<u8"),
+        ("n_sections", "<u8"),
+        ("n_stations", "<u8"),
+        ("segments_offset", "<u8"),
+        ("sections_offset", "<u8"),
+        ("stations_offset", "<u8"),
+    ]
+)
+# Every input column of every method; the ones a method does not use stay NaN
+INPUT_COLUMNS = (
+    "width",
+    "depth1",
+    "depth2",
+    "vel1",
+    "vel2",
+    "vel_08_1",
+    "vel_08_2",
+    "vel_02_1",
+    "vel_02_2",
+    "conversion_factor",
+    "surface_velocity",
+)
+SEGMENT_DTYPE = np.dtype([(name, "<f8") for name in INPUT_COLUMNS + ("area", "discharge")])
+SECTION_DTYPE = np.dtype(
+    [
+        ("station", "<u4"),
+        ("method", "<u4"),
+        ("section", f"S{NAME_BYTES}"),
+        ("date", "<M8[D]"),
+        ("first_segment", "<u8"),
+        ("n_segments", "<u8"),
+        ("total_area", "<f8"),
+        ("discharge", "<f8"),
+    ]
+)
+STATION_DTYPE = np.dtype(
+    [("name", f"S{NAME_BYTES}"), ("first_section", "<u8"), ("n_sections", "<u8")]
+)
+
+
+def _encode_name(value, what: str) -> bytes:
+    encoded = str(value).encode()
+    if len(encoded) > NAME_BYTES:
+        raise ValueError(f"{what} name {value!r} is longer than {NAME_BYTES} bytes")
+    return encoded
+
+
+def parse_date(value) -> np.datetime64:
+    """Day precision from an ISO string or datetime; blank means unknown (NaT)"""
+    if value is None or str(value).strip() == "":
+        return np.datetime64("NaT", "D")
+    return np.datetime64(str(value).strip()[:10], "D")
+
+
+def _align(f):
+    f.write(b"\0" * (-f.tell() % 8))
+    return f.tell()
+
+
+class ArchiveWriter:
+    """Stream sections into a new archive
+
+    Segment records go straight to disk; only the small per-section records
+    are held until close(), which sorts them and writes the indexes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(np.zeros(1, HEADER_DTYPE).tobytes())
+        self._segments_offset = self._file.tell()
+        self._n_segments = 0
+        self._stations = {}
+        self._sections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def add(self, station, section, method: str, date, columns: dict, result):
+        """Append one section: its input columns by name and its SectionResult"""
+        segments = np.full(len(result.areas), np.nan, dtype=SEGMENT_DTYPE)
+        for name, values in columns.items():
+            segments[name] = values
+        segments["area"] = result.areas
+        segments["discharge"] = result.discharges
+        self._file.write(segments.tobytes())
+
+        station = _encode_name(station, "Station")
+        self._stations.setdefault(station, len(self._stations))
+        self._sections.append(
+            (
+                self._stations[station],
+                METHOD_CODES[method],
+                _encode_name(section, "Section"),
+                parse_date(date),
+                self._n_segments,
+                len(segments),
+                float(result.areas.sum()),
+                result.total,
+            )
+        )
+        self._n_segments += len(segments)
+
+    def close(self):
+        f = self._file
+        names = sorted(self._stations)
+        # Renumber stations by name so the station table can be binary searched
+        renumber = np.empty(len(names), dtype=np.uint32)
+        for new, name in enumerate(names):
+            renumber[self._stations[name]] = new
+
+        sections = np.array(self._sections, dtype=SECTION_DTYPE)
+        if len(sections):
+            sections["station"] = renumber[sections["station"]]
+        sections = sections[np.lexsort((sections["date"], sections["station"]))]
+        counts = np.bincount(sections["station"], minlength=len(names))
+        stations = np.zeros(len(names), dtype=STATION_DTYPE)
+        stations["name"] = names
+        stations["n_sections"] = counts
+        stations["first_section"] = np.cumsum(counts) - counts
+
+        sections_offset = _align(f)
+        f.write(sections.tobytes())
+        stations_offset = _align(f)
+        f.write(stations.tobytes())
+
+        header = np.zeros(1, HEADER_DTYPE)
+        header[0] = (
+            MAGIC,
+            VERSION,
+            self._n_segments,
+            len(sections),
+            len(stations),
+            self._segments_offset,
+            sections_offset,
+            stations_offset,
+        )
+        f.seek(0)
+        f.write(header.tobytes())
+        f.close()
+
+
+class Archive:
+    """Read-only, memory-mapped view of an archive file"""
+
+    def __init__(self, path: str):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a discharge archive")
+        if header["version"][0] != VERSION:
+            raise ValueError(f"Unsupported archive version {header['version'][0]}")
+        self.header = header[0]
+        self.segments = self._table(path, SEGMENT_DTYPE, "segments")
+        self.sections = self._table(path, SECTION_DTYPE, "sections")
+        self.stations = self._table(path, STATION_DTYPE, "stations")
+
+    def _table(self, path, dtype, name):
+        n = int(self.header[f"n_{name}"])
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=int(self.header[f"{name}_offset"]), shape=(n,))
+
+    def __len__(self):
+        return len(self.sections)
+
+    def station_names(self):
+        return [name.decode() for name in self.stations["name"]]
+
+    def station_sections(self, station, start=None, end=None):
+        """Section records of one station dated in [start, end), as a memmap slice"""
+        name = _encode_name(station, "Station")
+        i = int(np.searchsorted(self.stations["name"], name))
+        if i == len(self.stations) or self.stations["name"][i] != name:
+            raise KeyError(f"Unknown station {station!r}")
+        first = int(self.stations["first_section"][i])
+        records = self.sections[first : first + int(self.stations["n_sections"][i])]
+        dates = records["date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, parse_date(start)))
+        hi = len(records) if end is None else int(np.searchsorted(dates, parse_date(end)))
+        return records[lo:hi]
+
+    def discharges(self, station, start=None, end=None) -> np.ndarray:
+        return self.station_sections(station, start, end)["discharge"]
+
+    def section_segments(self, record):
+        """Segment records (inputs, area and discharge) of one section record"""
+        first = int(record["first_segment"])
+        return self.segments[first : first + int(record["n_segments"])]
+
+    def method_name(self, record) -> str:
+        return list(METHODS)[int(record["method"])]
+
+
+def archive_station_file(path: str, output: str) -> int:
+    """Compute every section of a station file and store it in a new archive
+
+    An optional date column dates each section (its first row is used).
+    """
+    count = 0
+    with ArchiveWriter(output) as writer:
+        for key, rows in groupby(read_records(path), key=section_key):
+            rows = list(rows)
+            method = resolve_method(key[2])
+            columns = validate_chunk(method, rows)
+            result = compute_chunk(method, columns)
+            names = ("width", "depth1", "depth2") + METHODS[method][1]
+            writer.add(key[0], key[1], method, rows[0].get("date"), dict(zip(names, columns)), result)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Archive every section of a CSV or Excel station file")
+    build.add_argument("input")
+    build.add_argument("-o", "--output", default="gaugings.fma")
+    query = commands.add_parser("query", help="List the sections of one station")
+    query.add_argument("archive")
+    query.add_argument("--station", required=True)
+    query.add_argument("--from", dest="start", help="First date (inclusive)")
+    query.add_argument("--to", dest="end", help="Last date (exclusive)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            count = archive_station_file(args.input, args.output)
+            print(f"Archived {count} sections to {args.output} ({os.path.getsize(args.output):,} bytes)")
+            return
+        archive = Archive(args.archive)
+        records = archive.station_sections(args.station, args.start, args.end)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for record in records:
+        print(
+            f"{record['date']!s:<12} {record['section'].decode():<12} {archive.method_name(record):<10} "
+            f"{int(record['n_segments']):>6} {record['total_area']:>14.3f} {record['discharge']:>14.4f}"
+        )
+    print(f"{len(records)} sections, total discharge {records['discharge'].sum():.4f}")
+
+
+if __name__ == "__main__":
+    main()
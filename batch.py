@@ -0,0 +1,269 @@
+import argparse
+import csv
+import sys
+from itertools import groupby, islice
+
+import numpy as np
+
+import instrumentation
+import result_cache
+from discharge_kernel import discharge_0_6y, discharge_08y02y, discharge_surface
+
+# Method name -> (kernel, velocity columns, rounding used by the CLI)
+METHODS = {
+    "0.6Y": (discharge_0_6y, ("vel1", "vel2"), 3),
+    "0.8Y/0.2Y": (
+        discharge_08y02y,
+        ("vel_08_1", "vel_08_2", "vel_02_1", "vel_02_2"),
+        4,
+    ),
+    "surface": (discharge_surface, ("conversion_factor", "surface_velocity"), 4),
+}
+
+# Menu numbers from main.py are accepted as method names too
+METHOD_ALIASES = {"1": "0.6Y", "2": "0.8Y/0.2Y", "3": "surface"}
+
+RESULT_FIELDS = ["station", "section", "method", "segments", "total_area", "discharge"]
+
+# Rows held in memory at once; sections longer than this span several chunks
+DEFAULT_CHUNK_SIZE = 50_000
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
+
+def read_records(path: str):
+    """Yield one dict per row of a CSV or Excel station file"""
+    if path.lower().endswith(".xls"):
+        # Legacy workbooks can't be streamed by openpyxl; pandas reads them whole through xlrd
+        import pandas as pd
+
+        try:
+            df = pd.read_excel(path, engine="xlrd")
+        except ImportError:
+            raise ValueError(
+                "Reading .xls files needs the xlrd package; "
+                "install it or save the file as .xlsx or CSV"
+            )
+        df.columns = [str(c).strip() for c in df.columns]
+        yield from df.dropna(how="all").to_dict("records")
+    elif path.lower().endswith(EXCEL_EXTENSIONS):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(c).strip() for c in next(rows, ())]
+            for row in rows:
+                # Formatted but empty rows at the end of a sheet come through as all None
+                if all(value is None for value in row):
+                    continue
+                yield dict(zip(header, row))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def read_chunks(records, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield lists of at most chunk_size records"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_method(name) -> str:
+    name = str(name).strip()
+    name = METHOD_ALIASES.get(name, name)
+    if name not in METHODS:
+        raise ValueError(f"Unknown calculation method: {name!r}")
+    return name
+
+
+def section_key(record: dict):
+    return str(record["station"]), str(record["section"]), str(record["method"])
+
+
+def validate_chunk(method: str, rows: list):
+    """Convert a run of rows to float columns, rejecting missing or negative values"""
+    velocity_columns = METHODS[method][1]
+    columns = []
+    for col in ("width", "depth1", "depth2") + velocity_columns:
+        try:
+            values = np.array([float(row[col]) for row in rows], dtype=np.float64)
+        except KeyError:
+            raise ValueError(f"Missing column {col!r} for the {method} method")
+        except (TypeError, ValueError):
+            raise ValueError(f"Non-numeric value in column {col!r}")
+        if not np.isfinite(values).all() or (values < 0).any():
+            station, section, _ = section_key(rows[0])
+            raise ValueError(
+                f"Invalid {col} at station {station}, section {section}: "
+                "values must be finite and non-negative"
+            )
+        columns.append(values)
+    return columns
+
+
+def compute_chunk(method: str, columns: list):
+    """Run validated columns through the selected discharge method
+
+    Results are reused from the on-disk result cache when a cache directory
+    was given; otherwise chunks are computed directly, without hashing.
+    """
+    if result_cache.has_disk_tier():
+        return result_cache.compute(METHODS[method][0], *columns)
+    return METHODS[method][0](*columns)
+
+
+class SectionTotals:
+    """Running totals for one section while its rows stream past"""
+
+    def __init__(self, key):
+        self.station, self.section, method = key
+        self.key = key
+        self.method = resolve_method(method)
+        self.segments = 0
+        self.total_area = 0.0
+        self.discharge = 0.0
+
+    def add(self, result):
+        self.segments += len(result.areas)
+        self.total_area += float(result.areas.sum())
+        self.discharge += result.total
+
+    def merge(self, other: "SectionTotals"):
+        self.segments += other.segments
+        self.total_area += other.total_area
+        self.discharge += other.discharge
+
+    def result(self) -> dict:
+        digits = METHODS[self.method][2]
+        return {
+            "station": self.station,
+            "section": self.section,
+            "method": self.method,
+            "segments": self.segments,
+            "total_area": round(self.total_area, digits),
+            "discharge": round(self.discharge, digits),
+        }
+
+
+def chunk_totals(chunk: list):
+    """Partial totals for every run of rows belonging to one section in a chunk"""
+    partials = []
+    for key, rows in groupby(chunk, key=section_key):
+        totals = SectionTotals(key)
+        rows = list(rows)
+        with instrumentation.stage("validate"):
+            columns = validate_chunk(totals.method, rows)
+        with instrumentation.stage("compute"):
+            totals.add(compute_chunk(totals.method, columns))
+        instrumentation.count("points", len(rows))
+        partials.append(totals)
+    return partials
+
+
+def merge_totals(chunk_partials):
+    """Merge per-chunk partial totals in order and yield one result per section"""
+    current = None
+    for partials in chunk_partials:
+        for totals in partials:
+            if current is not None and current.key == totals.key:
+                current.merge(totals)
+                continue
+            if current is not None:
+                yield current.result()
+            current = totals
+    if current is not None:
+        yield current.result()
+
+
+def process_records(records, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Stream records chunk by chunk and yield one result per station/section
+
+    Rows of a section must be contiguous. Only one chunk and the running
+    totals of the current section are kept in memory.
+    """
+    return merge_totals(map(chunk_totals, read_chunks(records, chunk_size)))
+
+
+def write_results(results, path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        count = 0
+        for result in results:
+            writer.writerow(result)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calculate discharge for every station/section in a gauging file"
+    )
+    parser.add_argument("input", help="CSV or Excel file with one row per segment")
+    parser.add_argument(
+        "-o", "--output", default="results.csv", help="Results CSV (default: results.csv)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Rows processed per chunk (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; 0 uses every core (default: 1)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE_JSON",
+        help="Time each stage, print a summary and write a Chrome trace",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Keep computed sections on disk and reuse them on later runs",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print result cache hits and misses with --cache-dir (single process only)",
+    )
+    args = parser.parse_args(argv)
+    if args.profile:
+        instrumentation.enable()
+    if args.cache_dir:
+        # Earlier runs are found on disk; streamed chunks are not worth keeping in memory
+        result_cache.configure(args.cache_dir, max_bytes=0)
+
+    try:
+        if args.workers == 1:
+            results = process_records(read_records(args.input), args.chunk_size)
+        else:
+            from parallel import process_file_parallel
+
+            results = process_file_parallel(
+                args.input, args.workers or None, args.chunk_size
+            )
+        count = write_results(results, args.output)
+    except (KeyError, ValueError) as e:
+        print(f"Error processing {args.input}: {e}")
+        sys.exit(1)
+    print(f"Wrote {count} section results to {args.output}")
+    if args.profile:
+        instrumentation.export_chrome_trace(args.profile)
+        print(instrumentation.summary())
+    if args.cache_stats:
+        print(result_cache.default_cache().summary())
+
+
+if __name__ == "__main__":
+    main()
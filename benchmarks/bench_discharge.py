@@ -0,0 +1,420 @@
+"""Benchmark every discharge implementation on synthetic sections.
+
+Drives the vectorized kernel, the batch pipeline, the interactive CLIs
+(main.py, index5.py, sample1.py, sample2.py, with input() fed from a
+script) and the Streamlit apps (sample3, sample5 and sample6, which
+sample4 also serves; run bare with their number inputs fed from a script
+and tables uploaded as CSV) through the 0.6Y, 0.8Y/0.2Y and surface
+methods. Records throughput, peak traced memory and
+plot render time, and stores them as a JSON baseline.
+
+    python benchmarks/bench_discharge.py --save baseline.json
+    python benchmarks/bench_discharge.py --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import index5
+import main
+import result_cache
+import sample1
+
+METHODS = ("0.6Y", "0.8Y/0.2Y", "surface")
+DEFAULT_SIZES = [10**k for k in range(1, 8)]
+CONVERSION_FACTOR = 0.85
+SURFACE_VELOCITY = 3.0
+
+
+def synthetic_section(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    section = {"width": np.full(n, 20.0)}
+    for col in ("depth1", "depth2"):
+        section[col] = rng.uniform(0.5, 6.0, n)
+    for col in ("vel1", "vel2", "vel_08_1", "vel_08_2", "vel_02_1", "vel_02_2"):
+        section[col] = rng.uniform(0.2, 4.0, n)
+    return section
+
+
+def method_columns(method: str, section: dict):
+    velocity_columns = batch.METHODS[method][1]
+    if method == "surface":
+        velocity_columns = ()
+    return [section[col] for col in ("width", "depth1", "depth2") + velocity_columns]
+
+
+def prompt_answers(method: str, section: dict):
+    """Answers in the order the interactive CLIs ask for them"""
+    rows = np.column_stack(method_columns(method, section)).astype(str)
+    answers = rows.ravel().tolist()
+    if method == "surface":
+        answers = [str(CONVERSION_FACTOR), str(SURFACE_VELOCITY)] + answers
+    return answers
+
+
+@contextlib.contextmanager
+def scripted_input(answers):
+    """Feed input() from a list and silence prompts/prints"""
+    feed = iter(answers)
+    original = builtins.input
+    builtins.input = lambda prompt="": next(feed)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original
+
+
+# --- Runners: each returns a zero-argument callable that performs one run ---
+
+
+def run_kernel(method, section):
+    kernel = batch.METHODS[method][0]
+    columns = method_columns(method, section)
+    if method == "surface":
+        return lambda: kernel(*columns, CONVERSION_FACTOR, SURFACE_VELOCITY)
+    return lambda: kernel(*columns)
+
+
+def run_batch(method, section):
+    names = ("width", "depth1", "depth2") + batch.METHODS[method][1]
+    if method == "surface":
+        section = dict(section)
+        section["conversion_factor"] = np.full(len(section["width"]), CONVERSION_FACTOR)
+        section["surface_velocity"] = np.full(len(section["width"]), SURFACE_VELOCITY)
+    columns = [section[name].astype(str) for name in names]
+    keys = {"station": "S1", "section": "1", "method": method}
+    records = [dict(keys, **dict(zip(names, row))) for row in zip(*columns)]
+    return lambda: list(batch.process_records(records))
+
+
+def _no_plot(*args, **kwargs):
+    return None
+
+
+@contextlib.contextmanager
+def patched(module, **attrs):
+    original = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+
+def _cli_runner(calculators, module=None, **patches):
+    """Figures are timed separately, so plotting hooks can be swapped for no-ops"""
+
+    def runner(method, section):
+        answers = prompt_answers(method, section)
+        n = len(section["width"])
+
+        def run():
+            with scripted_input(answers), patched(module, **patches):
+                return calculators[method](n)
+
+        return run
+
+    return runner
+
+
+run_main = _cli_runner(
+    {
+        "0.6Y": main.calculate_discharge_0_6y,
+        "0.8Y/0.2Y": main.calculate_discharge_08y02y,
+        "surface": main.calculate_discharge_surface,
+    },
+    main,
+    plot_measurements=_no_plot,
+    build_flow_figure=_no_plot,
+)
+run_index5 = _cli_runner(
+    {
+        "0.6Y": index5.calculate_discharge_0_6y,
+        "0.8Y/0.2Y": index5.calculate_discharge_0_8y_0_2y,
+        "surface": index5.calculate_discharge_surface,
+    }
+)
+
+
+def _calculator(cls, n):
+    """Build an interactive DischargeCalculator without its input() prompts"""
+    calc = cls.__new__(cls)
+    calc.n_points = n
+    calc.depths, calc.velocities, calc.discharges, calc.widths, calc.areas = [], [], [], [], []
+    calc.plot_results = _no_plot
+    return calc
+
+
+CALCULATOR_METHODS = {
+    "0.6Y": "calculate_0_6y_method",
+    "0.8Y/0.2Y": "calculate_0_8y_0_2y_method",
+    "surface": "calculate_surface_velocity_method",
+}
+
+
+def _sample_runner(module):
+    def runner(method, section):
+        answers = prompt_answers(method, section)
+        n = len(section["width"])
+
+        def run():
+            calc = _calculator(module.DischargeCalculator, n)
+            with scripted_input(answers):
+                return getattr(calc, CALCULATOR_METHODS[method])()
+
+        return run
+
+    return runner
+
+
+@contextlib.contextmanager
+def scripted_widgets(answers):
+    """Feed st.number_input from a list, as scripted_input does for input()"""
+    import streamlit as st
+
+    feed = iter(answers)
+    with patched(st, number_input=lambda *args, **kwargs: next(feed)):
+        yield
+
+
+def _widget_runner(module):
+    """Streamlit apps with one number input per reading (sample3, sample5)"""
+
+    def runner(method, section):
+        answers = [float(a) for a in prompt_answers(method, section)]
+        n = len(section["width"])
+
+        def run():
+            calc = module.DischargeCalculator()
+            calc.plot_results = calc.plot_schematic = _no_plot
+            with scripted_widgets(answers):
+                return getattr(calc, CALCULATOR_METHODS[method])(n)
+
+        return run
+
+    return runner
+
+
+TABLE_METHODS = {"0.6Y": "0.6Y Method", "0.8Y/0.2Y": "0.8Y/0.2Y Method", "surface": "Surface Velocity Method"}
+
+
+def _table_runner(module):
+    """Streamlit app with a measurement table (sample6, also served by sample4), fed an uploaded CSV"""
+
+    def runner(method, section):
+        import pandas as pd
+
+        name = TABLE_METHODS[method]
+        columns = ["width", "depth1", "depth2"] + module.VELOCITY_COLUMNS[name]
+        data = pd.DataFrame({col: section[col] for col in columns}).to_csv(index=False).encode()
+        n = len(section["width"])
+
+        def run():
+            upload = io.BytesIO(data)
+            upload.name = "section.csv"
+            # Time the computation, not a result cached by the previous run
+            result_cache.default_cache().clear(disk=False)
+            calc = module.DischargeCalculator()
+            calc.plot_schematic = _no_plot
+            with scripted_widgets([CONVERSION_FACTOR, SURFACE_VELOCITY]):
+                return getattr(calc, CALCULATOR_METHODS[method])(n, upload)
+
+        return run
+
+    return runner
+
+
+def render_flow_figure(method, section):
+    import matplotlib.pyplot as plt
+
+    result = run_kernel(method, section)()
+    depths = (section["depth1"] + section["depth2"]) / 2
+    points = np.arange(1, len(depths) + 1)
+    # The values panel shows what each method measured, as main.py and sample2.plot_results do
+    if method == "0.6Y":
+        values, panel = (section["vel1"] + section["vel2"]) / 2, main.VELOCITY_PANEL
+    elif method == "0.8Y/0.2Y":
+        avg_08 = (section["vel_08_1"] + section["vel_08_2"]) / 2
+        avg_02 = (section["vel_02_1"] + section["vel_02_2"]) / 2
+        values, panel = (avg_08 + avg_02) / 2, main.VELOCITY_PANEL
+    else:
+        values, panel = result.areas, main.AREA_PANEL
+
+    def run():
+        fig = main.build_flow_figure(points, depths, values, result.discharges, method, panel)
+        fig.savefig(io.BytesIO(), format="png")
+        plt.close(fig)
+
+    return run
+
+
+def render_schematic(method, section):
+    from matplotlib.figure import Figure
+
+    import schematic
+
+    depths = np.column_stack([section["depth1"], section["depth2"]])
+    velocities = section["vel1"]
+
+    def run():
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        ax.invert_yaxis()
+        schematic.draw_schematic(ax, method, depths, velocities)
+        fig.savefig(io.BytesIO(), format="png")
+
+    return run
+
+
+# name -> (runner, largest size it is run at by default)
+IMPLEMENTATIONS = {
+    "discharge_kernel": (run_kernel, 10**7),
+    "batch": (run_batch, 10**6),
+    "main": (run_main, 10**5),
+    "index5": (run_index5, 10**5),
+    "sample1": (_sample_runner(sample1), 10**5),
+    "plot:flow_figure": (render_flow_figure, 10**5),
+    "plot:schematic": (render_schematic, 10**6),
+}
+
+try:
+    import sample2
+
+    IMPLEMENTATIONS["sample2"] = (_sample_runner(sample2), 10**5)
+except ImportError:  # seaborn is only needed by the plotting samples
+    pass
+
+try:
+    import streamlit
+    import streamlit.logger
+
+    # The apps run without `streamlit run`; keep its bare-mode warnings out of the report
+    streamlit.config.set_option("logger.level", "error")
+    streamlit.logger.set_log_level("error")
+    streamlit.config.set_option("global.showWarningOnDirectExecution", False)
+
+    import sample3
+    import sample5
+    import sample6
+
+    IMPLEMENTATIONS["sample3"] = (_widget_runner(sample3), 10**4)
+    IMPLEMENTATIONS["sample5"] = (_widget_runner(sample5), 10**4)
+    IMPLEMENTATIONS["sample6"] = (_table_runner(sample6), 10**6)
+except ImportError:  # streamlit and seaborn are only needed by the web apps
+    pass
+
+
+def measure(run, repeat: int) -> dict:
+    run()  # warm-up, also catches harness errors before timing
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run_suite(sizes, only=None, repeat: int = 3, size_cap: int = None):
+    results = []
+    for name, (runner, max_size) in IMPLEMENTATIONS.items():
+        if only and name not in only:
+            continue
+        for size in sizes:
+            if size > (size_cap or max_size):
+                continue
+            section = synthetic_section(size)
+            for method in METHODS:
+                stats = measure(runner(method, section), repeat if size <= 10**5 else 1)
+                stats.update(
+                    name=name,
+                    method=method,
+                    size=size,
+                    throughput=size / stats["seconds"] if stats["seconds"] else float("inf"),
+                )
+                results.append(stats)
+                print(
+                    f"{name:<20} {method:<10} {size:>9} "
+                    f"{stats['seconds'] * 1000:10.2f} ms {stats['throughput']:14,.0f} pts/s "
+                    f"{stats['peak_bytes'] / 1e6:9.2f} MB"
+                )
+    return results
+
+
+def compare(results, baseline, tolerance: float):
+    """Return the regressions of results against a saved baseline"""
+    previous = {(r["name"], r["method"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["name"], result["method"], result["size"]))
+        if old is None:
+            continue
+        if result["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append((result, old, "throughput"))
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + tolerance):
+            regressions.append((result, old, "peak_bytes"))
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--max-size", type=int, help="Override every implementation's size limit")
+    parser.add_argument("--only", nargs="+", choices=sorted(IMPLEMENTATIONS), help="Implementations to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument("--save", help="Write results to this JSON baseline")
+    parser.add_argument("--compare", help="Fail if results regress against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.only, args.repeat, args.max_size)
+
+    if args.save:
+        meta = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        }
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for result, old, metric in regressions:
+            print(
+                f"REGRESSION {result['name']} {result['method']} n={result['size']}: "
+                f"{metric} {old[metric]:,.0f} -> {result[metric]:,.0f}"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main_cli()
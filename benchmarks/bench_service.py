@@ -0,0 +1,114 @@
+"""Load test the discharge HTTP service over keep-alive connections.
+
+Starts service.py in-process on a free port (or targets --url), opens one
+persistent connection per client thread and reports throughput and latency
+percentiles for typical sections.
+
+    python benchmarks/bench_service.py --clients 8 --requests 5000
+    python benchmarks/bench_service.py --url http://127.0.0.1:8080 --batch 50
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service import DischargeServer
+
+
+def typical_section(rng, n_segments: int) -> dict:
+    depths = rng.uniform(0.5, 6.0, n_segments + 1)
+    velocities = rng.uniform(0.2, 4.0, n_segments + 1)
+    return {
+        "method": "0.6Y",
+        "width": [20.0] * n_segments,
+        "depth1": depths[:-1].round(3).tolist(),
+        "depth2": depths[1:].round(3).tolist(),
+        "vel1": velocities[:-1].round(3).tolist(),
+        "vel2": velocities[1:].round(3).tolist(),
+    }
+
+
+def client(host, port, path, bodies, latencies, errors):
+    connection = http.client.HTTPConnection(host, port)
+    for body in bodies:
+        start = time.perf_counter()
+        connection.request("POST", path, body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def run(host, port, clients: int, requests: int, segments: int, batch: int):
+    rng = np.random.default_rng(0)
+    path = "/batch" if batch > 1 else "/discharge"
+    payloads = []
+    for _ in range(min(requests, 200)):
+        if batch > 1:
+            payloads.append({"sections": [typical_section(rng, segments) for _ in range(batch)]})
+        else:
+            payloads.append(typical_section(rng, segments))
+    bodies = [json.dumps(p).encode() for p in payloads]
+    per_client = requests // clients
+
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(host, port, path, [bodies[(c + i) % len(bodies)] for i in range(per_client)], latencies, errors),
+        )
+        for c in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    print(
+        f"{len(ms)} requests ({path}, {segments} segments x {batch} sections) from {clients} clients "
+        f"in {elapsed:.2f} s: {len(ms) / elapsed:,.0f} req/s, "
+        f"p50 {p50:.2f} ms, p90 {p90:.2f} ms, p99 {p99:.2f} ms, max {ms.max():.2f} ms, {len(errors)} errors"
+    )
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Existing service to target (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--segments", type=int, default=20, help="Segments per section")
+    parser.add_argument("--batch", type=int, default=1, help="Sections per request (>1 uses /batch)")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port
+    else:
+        server = DischargeServer(("127.0.0.1", 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+    try:
+        run(host, port, args.clients, args.requests, args.segments, args.batch)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main_cli()
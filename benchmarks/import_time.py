@@ -0,0 +1,69 @@
+"""Import-time check for the compute-only modules.
+
+Starts a fresh interpreter per module, records how long the import takes and
+fails if any plotting or UI package was pulled in along the way.
+
+    python benchmarks/import_time.py [--budget SECONDS] [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must import without the plotting/UI stack
+COMPUTE_MODULES = ["discharge_kernel", "batch", "parallel", "main", "index5"]
+FORBIDDEN = ["matplotlib", "seaborn", "streamlit", "pandas"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, forbidden=FORBIDDEN)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        runs.append(json.loads(out.stdout))
+    return {
+        "module": module,
+        "seconds": min(run["seconds"] for run in runs),
+        "loaded": runs[0]["loaded"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.5, help="Max import seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module (best is kept)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in COMPUTE_MODULES:
+        result = measure(module, args.repeat)
+        problems = []
+        if result["loaded"]:
+            problems.append(f"imported {', '.join(result['loaded'])}")
+        if result["seconds"] > args.budget:
+            problems.append(f"over {args.budget:.2f}s budget")
+        failed |= bool(problems)
+        status = "FAIL " + "; ".join(problems) if problems else "ok"
+        print(f"{module:<20} {result['seconds'] * 1000:8.1f} ms  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
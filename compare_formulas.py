@@ -1,10 +1,11 @@
-import pandas as pd
 import numpy as np
 
+from workbook_cache import load_workbook_frame
+
 def read_excel_formulas():
     try:
-        # Read the Excel file
-        df = pd.read_excel('fm cep excel.xlsx')
+        # Read the Excel file (parsed once, then served from the columnar cache)
+        df = load_workbook_frame('fm cep excel.xlsx')
         print("Excel Formulas:")
         print(df)
         return df
@@ -0,0 +1,61 @@
+import numpy as np
+from typing import NamedTuple, Union
+
+
+class SectionResult(NamedTuple):
+    """Per-segment results of one section
+
+    With 2-D input each row is its own section, cumulative runs along the
+    rows and total is an array with one total per row.
+    """
+
+    areas: np.ndarray
+    discharges: np.ndarray
+    cumulative: np.ndarray
+    total: Union[float, np.ndarray]
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def pair_verticals(values):
+    """Split per-vertical readings into (first, second) arrays for each segment"""
+    values = _as_array(values)
+    return values[:-1], values[1:]
+
+
+def segment_areas(widths, depth1, depth2):
+    """Calculate area of every segment using average depth * width"""
+    return ((_as_array(depth1) + _as_array(depth2)) / 2) * _as_array(widths)
+
+
+def _section_result(areas, discharges):
+    cumulative = np.cumsum(discharges, axis=-1)
+    if cumulative.ndim > 1:
+        # Each row is its own section (e.g. a batch of perturbed realizations)
+        return SectionResult(areas, discharges, cumulative, cumulative[..., -1])
+    total = float(cumulative[-1]) if cumulative.size else 0.0
+    return SectionResult(areas, discharges, cumulative, total)
+
+
+def discharge_0_6y(widths, depth1, depth2, vel1, vel2):
+    """Discharge of every segment using the 0.6Y velocity at both ends"""
+    areas = segment_areas(widths, depth1, depth2)
+    avg_velocity = (_as_array(vel1) + _as_array(vel2)) / 2
+    return _section_result(areas, areas * avg_velocity)
+
+
+def discharge_08y02y(widths, depth1, depth2, vel_08_1, vel_08_2, vel_02_1, vel_02_2):
+    """Discharge of every segment using the average of 0.8Y and 0.2Y velocities"""
+    areas = segment_areas(widths, depth1, depth2)
+    avg_vel_08 = (_as_array(vel_08_1) + _as_array(vel_08_2)) / 2
+    avg_vel_02 = (_as_array(vel_02_1) + _as_array(vel_02_2)) / 2
+    avg_velocity = (avg_vel_08 + avg_vel_02) / 2
+    return _section_result(areas, areas * avg_velocity)
+
+
+def discharge_surface(widths, depth1, depth2, conversion_factor, surface_velocity):
+    """Discharge of every segment using a converted surface velocity"""
+    areas = segment_areas(widths, depth1, depth2)
+    return _section_result(areas, conversion_factor * areas * surface_velocity)
@@ -0,0 +1,150 @@
+import numpy as np
+from typing import List, NamedTuple
+
+from discharge_kernel import SectionResult
+
+
+class FenwickTree:
+    """Binary indexed tree over float values: O(log n) point update and prefix sum"""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        prefix = np.concatenate([[0.0], np.cumsum(values)])
+        k = np.arange(1, n + 1)
+        # 1-based tree: node k covers the (k & -k) values ending at k
+        self._tree = np.zeros(n + 1)
+        self._tree[1:] = prefix[k] - prefix[k - (k & -k)]
+        self._size = n
+
+    def __len__(self):
+        return self._size
+
+    def add(self, index: int, delta: float):
+        """Add delta to the value at 0-based index"""
+        k = index + 1
+        while k <= self._size:
+            self._tree[k] += delta
+            k += k & -k
+
+    def prefix(self, count: int) -> float:
+        """Sum of the first count values"""
+        total = 0.0
+        k = count
+        while k > 0:
+            total += self._tree[k]
+            k -= k & -k
+        return float(total)
+
+    def total(self) -> float:
+        return self.prefix(self._size)
+
+
+class SegmentDelta(NamedTuple):
+    index: int
+    old_discharge: float
+    new_discharge: float
+    total: float
+
+    @property
+    def change(self) -> float:
+        return self.new_discharge - self.old_discharge
+
+
+class IncrementalSection:
+    """Per-segment discharges with a prefix-sum index for cheap single-segment edits
+
+    kernel is one of the discharge_kernel functions, columns are its
+    per-segment arrays and params any trailing scalars (the surface
+    method's conversion factor and surface velocity). Editing one segment
+    recomputes only that segment and updates the total and cumulative
+    discharge in O(log n).
+    """
+
+    def __init__(self, kernel, columns, *params, result: SectionResult = None):
+        self.kernel = kernel
+        self.columns = [np.array(col, dtype=np.float64) for col in columns]
+        self.params = params
+        if result is None:
+            result = kernel(*self.columns, *params)
+        self.areas = np.array(result.areas, dtype=np.float64)
+        self.discharges = np.array(result.discharges, dtype=np.float64)
+        self.index = FenwickTree(self.discharges)
+        self._cumulative = np.cumsum(self.discharges)
+        self._stale_from = None  # first segment whose cumulative value is out of date
+
+    def __len__(self):
+        return len(self.discharges)
+
+    @property
+    def total(self) -> float:
+        return self.index.total()
+
+    def cumulative(self, index: int) -> float:
+        """Cumulative discharge up to and including segment index"""
+        return self.index.prefix(index + 1)
+
+    def compatible(self, n_segments: int, *params) -> bool:
+        """Whether edits can be applied instead of rebuilding from scratch"""
+        return n_segments == len(self) and params == self.params
+
+    def update(self, index: int, row) -> SegmentDelta:
+        """Replace the column values of one segment and return the discharge change"""
+        for col, value in zip(self.columns, row):
+            col[index] = value
+        segment = self.kernel(*(col[index : index + 1] for col in self.columns), *self.params)
+        old = float(self.discharges[index])
+        new = float(segment.discharges[0])
+        self.areas[index] = segment.areas[0]
+        self.discharges[index] = new
+        self.index.add(index, new - old)
+        self._mark_stale(index)
+        return SegmentDelta(index, old, new, self.total)
+
+    def update_many(self, indices, rows) -> List[SegmentDelta]:
+        """Replace several segments with one kernel call; later rows win on repeated indices"""
+        indices = np.asarray(indices, dtype=np.intp)
+        rows = np.asarray(rows, dtype=np.float64).reshape(len(indices), len(self.columns))
+        for col, values in zip(self.columns, rows.T):
+            col[indices] = values
+        # Recompute each touched segment once, from its final values
+        touched = np.unique(indices)
+        segment = self.kernel(*(col[touched] for col in self.columns), *self.params)
+        deltas = []
+        for index, area, new in zip(touched.tolist(), segment.areas, segment.discharges.tolist()):
+            old = float(self.discharges[index])
+            self.areas[index] = area
+            self.discharges[index] = new
+            self.index.add(index, new - old)
+            deltas.append(SegmentDelta(index, old, new, 0.0))
+        self._mark_stale(int(touched[0]))
+        total = self.total
+        return [delta._replace(total=total) for delta in deltas]
+
+    def apply(self, columns) -> List[SegmentDelta]:
+        """Apply every segment that differs from the given columns"""
+        columns = [np.asarray(col, dtype=np.float64) for col in columns]
+        changed = np.zeros(len(self), dtype=bool)
+        for old, new in zip(self.columns, columns):
+            changed |= old != new
+        indices = np.flatnonzero(changed)
+        if not len(indices):
+            return []
+        return self.update_many(indices, np.column_stack(columns)[indices])
+
+    def _mark_stale(self, index: int):
+        if self._stale_from is None or index < self._stale_from:
+            self._stale_from = index
+
+    def result(self) -> SectionResult:
+        """Full per-segment view; the cumulative curve is redone only from the first edited segment"""
+        start = self._stale_from
+        if start is not None:
+            # Carry the kept prefix into the first value so the sums run in the same order as a full cumsum
+            suffix = self._cumulative[start:]
+            suffix[:] = self.discharges[start:]
+            if start:
+                suffix[0] += self._cumulative[start - 1]
+            np.cumsum(suffix, out=suffix)
+            self._stale_from = None
+        return SectionResult(self.areas, self.discharges, self._cumulative, self.total)
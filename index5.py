@@ -1,3 +1,6 @@
+from discharge_kernel import discharge_0_6y, discharge_08y02y, discharge_surface
+
+
 def get_inputs():
     num_measurement_points = int(input("Enter the number of measurement points: "))
     print("\nSelect the calculation method:")
@@ -9,61 +12,69 @@ def get_inputs():
 
 
 def calculate_discharge_0_6y(num_points):
-    total_discharge = 0
+    widths, depths_first, depths_second = [], [], []
+    velocities_first, velocities_second = [], []
     for _ in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
+        widths.append(
+            float(input("\nEnter the width between measurement points (in feet): "))
+        )
+        depths_first.append(
+            float(input("Enter the depth at the first measurement point (in feet): "))
         )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
+        depths_second.append(
+            float(input("Enter the depth at the second measurement point (in feet): "))
         )
-        velocity_first = float(
-            input("Enter the velocity at the first measurement point (in ft/s): ")
+        velocities_first.append(
+            float(input("Enter the velocity at the first measurement point (in ft/s): "))
         )
-        velocity_second = float(
-            input("Enter the velocity at the second measurement point (in ft/s): ")
+        velocities_second.append(
+            float(input("Enter the velocity at the second measurement point (in ft/s): "))
         )
 
-        avg_velocity = (velocity_first + velocity_second) / 2
-        cross_section_area = ((depth_first + depth_second) / 2) * width
-        point_discharge = cross_section_area * avg_velocity
-        total_discharge += point_discharge
-    return round(total_discharge, 3)
+    result = discharge_0_6y(
+        widths, depths_first, depths_second, velocities_first, velocities_second
+    )
+    return round(result.total, 3)
 
 
 def calculate_discharge_0_8y_0_2y(num_points):
-    total_discharge = 0
+    widths, depths_first, depths_second = [], [], []
+    velocities_08y_first, velocities_08y_second = [], []
+    velocities_02y_first, velocities_02y_second = [], []
     for _ in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
+        widths.append(
+            float(input("\nEnter the width between measurement points (in feet): "))
+        )
+        depths_first.append(
+            float(input("Enter the depth at the first measurement point (in feet): "))
         )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
+        depths_second.append(
+            float(input("Enter the depth at the second measurement point (in feet): "))
         )
 
-        velocity_08y_first = float(
-            input("Enter the velocity at 0.8Y depth for first point (in ft/s): ")
+        velocities_08y_first.append(
+            float(input("Enter the velocity at 0.8Y depth for first point (in ft/s): "))
         )
-        velocity_08y_second = float(
-            input("Enter the velocity at 0.8Y depth for second point (in ft/s): ")
+        velocities_08y_second.append(
+            float(input("Enter the velocity at 0.8Y depth for second point (in ft/s): "))
         )
-        velocity_02y_first = float(
-            input("Enter the velocity at 0.2Y depth for first point (in ft/s): ")
+        velocities_02y_first.append(
+            float(input("Enter the velocity at 0.2Y depth for first point (in ft/s): "))
         )
-        velocity_02y_second = float(
-            input("Enter the velocity at 0.2Y depth for second point (in ft/s): ")
+        velocities_02y_second.append(
+            float(input("Enter the velocity at 0.2Y depth for second point (in ft/s): "))
         )
 
-        avg_velocity_first = (velocity_08y_first + velocity_02y_first) / 2
-        avg_velocity_second = (velocity_08y_second + velocity_02y_second) / 2
-        avg_velocity = (avg_velocity_first + avg_velocity_second) / 2
-
-        cross_section_area = ((depth_first + depth_second) / 2) * width
-        point_discharge = cross_section_area * avg_velocity
-        total_discharge += point_discharge
-    return round(total_discharge, 4)
+    result = discharge_08y02y(
+        widths,
+        depths_first,
+        depths_second,
+        velocities_08y_first,
+        velocities_08y_second,
+        velocities_02y_first,
+        velocities_02y_second,
+    )
+    return round(result.total, 4)
 
 
 def calculate_discharge_surface(num_points):
@@ -71,21 +82,23 @@ def calculate_discharge_surface(num_points):
         input("\nEnter the conversion factor for surface velocity: ")
     )
     surface_velocity = float(input("Enter the measured surface velocity (in ft/s): "))
-    total_area = 0
+    widths, depths_first, depths_second = [], [], []
 
     for _ in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
+        widths.append(
+            float(input("\nEnter the width between measurement points (in feet): "))
         )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
+        depths_first.append(
+            float(input("Enter the depth at the first measurement point (in feet): "))
+        )
+        depths_second.append(
+            float(input("Enter the depth at the second measurement point (in feet): "))
         )
 
-        point_area = ((depth_first + depth_second) / 2) * width
-        total_area += point_area
-
-    return round(conversion_factor * total_area * surface_velocity, 4)
+    result = discharge_surface(
+        widths, depths_first, depths_second, conversion_factor, surface_velocity
+    )
+    return round(result.total, 4)
 
 
 def main():
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Off unless DISCHARGE_PROFILE=1 is set or enable() is called
+_enabled = os.environ.get("DISCHARGE_PROFILE", "") not in ("", "0")
+_events = []
+_counters = defaultdict(int)
+_lock = threading.Lock()
+_NOOP = nullcontext()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _events.clear()
+        _counters.clear()
+
+
+def drain():
+    """Remove and return the recorded (events, counters), e.g. to send them from a worker"""
+    with _lock:
+        events, counters = list(_events), dict(_counters)
+        _events.clear()
+        _counters.clear()
+    return events, counters
+
+
+def merge(events, counters):
+    """Add events and counters recorded elsewhere, such as a worker's drain()"""
+    with _lock:
+        _events.extend(events)
+        for name, value in counters.items():
+            _counters[name] += value
+
+
+@contextmanager
+def _timed_stage(name: str):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        with _lock:
+            _events.append((name, start, end - start, os.getpid(), threading.get_ident()))
+
+
+def stage(name: str):
+    """Context manager timing one stage; a shared no-op when disabled"""
+    if not _enabled:
+        return _NOOP
+    return _timed_stage(name)
+
+
+def timed(name: str = None):
+    """Decorator timing every call of a function as a stage"""
+
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _timed_stage(label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, n: int = 1):
+    """Add n to a named counter, e.g. points processed"""
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def summary() -> str:
+    """Per-stage call count, total and mean time, plus counters, as a text table"""
+    totals = defaultdict(lambda: [0, 0])
+    with _lock:
+        for name, _, duration, _, _ in _events:
+            totals[name][0] += 1
+            totals[name][1] += duration
+        counters = dict(_counters)
+
+    lines = [f"{'Stage':<30} {'Calls':>8} {'Total (ms)':>12} {'Mean (ms)':>12}"]
+    for name, (calls, duration) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<30} {calls:>8} {duration / 1e6:>12.3f} {duration / calls / 1e6:>12.3f}")
+    for name, value in sorted(counters.items()):
+        lines.append(f"{name:<30} {value:>8}")
+    return "\n".join(lines)
+
+
+def export_chrome_trace(path: str):
+    """Write recorded stages as a Chrome trace (chrome://tracing, Perfetto)"""
+    with _lock:
+        events = [
+            {"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": pid, "tid": tid}
+            for name, start, duration, pid, tid in _events
+        ]
+        end = max((e["ts"] + e["dur"] for e in events), default=0)
+        events.extend(
+            {"name": name, "ph": "C", "ts": end, "pid": os.getpid(), "args": {name: value}}
+            for name, value in _counters.items()
+        )
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
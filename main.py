@@ -1,8 +1,14 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
+from discharge_kernel import discharge_0_6y, discharge_08y02y, discharge_surface
+from instrumentation import count, is_enabled, stage, summary, timed
+from result_cache import compute, default_cache
+
 
 def set_dark_theme():
+    # Plotting is imported lazily so the calculations start without matplotlib
+    import matplotlib.pyplot as plt
+
     plt.style.use("dark_background")
     plt.rcParams["figure.facecolor"] = "#1C1C1C"
     plt.rcParams["axes.facecolor"] = "#2D2D2D"
@@ -25,9 +31,18 @@ def get_inputs():
     return num_points, method_choice
 
 
-def plot_measurements(points, depths, velocities, discharges, method_name):
+VELOCITY_PANEL = ("Velocity Profile", "Velocity (ft/s)")
+AREA_PANEL = ("Cross-sectional Area Profile", "Area (sq ft)")
+
+
+@timed("build_flow_figure")
+def build_flow_figure(
+    points, depths, values, discharges, method_name, panel=VELOCITY_PANEL
+):
+    import matplotlib.pyplot as plt
+
     set_dark_theme()
-    plt.figure(figsize=(15, 10))
+    fig = plt.figure(figsize=(15, 10))
 
     # Plot depths
     plt.subplot(221)
@@ -37,12 +52,13 @@ def plot_measurements(points, depths, velocities, discharges, method_name):
     plt.ylabel("Depth (ft)", fontsize=10)
     plt.grid(True)
 
-    # Plot velocities
+    # Plot velocities (or areas for the surface method)
+    title, ylabel = panel
     plt.subplot(222)
-    plt.plot(points, velocities, "-o", linewidth=2, markersize=8, color="#FF6B6B")
-    plt.title("Velocity Profile", fontsize=12, pad=15, color="white")
+    plt.plot(points, values, "-o", linewidth=2, markersize=8, color="#FF6B6B")
+    plt.title(title, fontsize=12, pad=15, color="white")
     plt.xlabel("Measurement Points", fontsize=10)
-    plt.ylabel("Velocity (ft/s)", fontsize=10)
+    plt.ylabel(ylabel, fontsize=10)
     plt.grid(True)
 
     # Plot discharges
@@ -66,89 +82,117 @@ def plot_measurements(points, depths, velocities, discharges, method_name):
 
     plt.suptitle(f"Flow Analysis - {method_name}", fontsize=14, y=0.95, color="white")
     plt.tight_layout()
-    plt.show()
+    return fig
+
+
+def plot_measurements(points, depths, velocities, discharges, method_name):
+    import matplotlib.pyplot as plt
+
+    build_flow_figure(points, depths, velocities, discharges, method_name)
+    with stage("plt.show"):
+        plt.show()
 
 
 def calculate_discharge_0_6y(num_points):
-    total_discharge = 0
-    depths = []
-    velocities = []
-    discharges = []
-
-    for i in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
-        )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
+    widths = []
+    depths_first = []
+    depths_second = []
+    velocities_first = []
+    velocities_second = []
+
+    with stage("input"):
+        for i in range(num_points):
+            widths.append(
+                float(input("\nEnter the width between measurement points (in feet): "))
+            )
+            depths_first.append(
+                float(input("Enter the depth at the first measurement point (in feet): "))
+            )
+            depths_second.append(
+                float(input("Enter the depth at the second measurement point (in feet): "))
+            )
+            velocities_first.append(
+                float(input("Enter the velocity at the first measurement point (in ft/s): "))
+            )
+            velocities_second.append(
+                float(input("Enter the velocity at the second measurement point (in ft/s): "))
+            )
+
+    with stage("compute"):
+        count("points", num_points)
+        result = compute(
+            discharge_0_6y,
+            widths, depths_first, depths_second, velocities_first, velocities_second
         )
-        velocity_first = float(
-            input("Enter the velocity at the first measurement point (in ft/s): ")
-        )
-        velocity_second = float(
-            input("Enter the velocity at the second measurement point (in ft/s): ")
-        )
-        avg_velocity = (velocity_first + velocity_second) / 2
-        cross_section_area = ((depth_first + depth_second) / 2) * width
-        point_discharge = cross_section_area * avg_velocity
-        total_discharge += point_discharge
-
-        # Store values for plotting
-        depths.append((depth_first + depth_second) / 2)
-        velocities.append(avg_velocity)
-        discharges.append(point_discharge)
+        depths = (np.asarray(depths_first) + np.asarray(depths_second)) / 2
+        velocities = (np.asarray(velocities_first) + np.asarray(velocities_second)) / 2
 
     # Create plots
     points = list(range(1, num_points + 1))
-    plot_measurements(points, depths, velocities, discharges, "0.6Y Method")
+    plot_measurements(points, depths, velocities, result.discharges, "0.6Y Method")
 
-    return round(total_discharge, 3)
+    return round(result.total, 3)
 
 
 def calculate_discharge_08y02y(num_points):
-    total_discharge = 0
-    depths = []
-    velocities = []
-    discharges = []
-
-    for i in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
+    widths = []
+    depths_first = []
+    depths_second = []
+    velocities_08y_first = []
+    velocities_08y_second = []
+    velocities_02y_first = []
+    velocities_02y_second = []
+
+    with stage("input"):
+        for i in range(num_points):
+            widths.append(
+                float(input("\nEnter the width between measurement points (in feet): "))
+            )
+            depths_first.append(
+                float(input("Enter the depth at the first measurement point (in feet): "))
+            )
+            depths_second.append(
+                float(input("Enter the depth at the second measurement point (in feet): "))
+            )
+            velocities_08y_first.append(
+                float(input("Enter the velocity at 0.8Y depth for first point (in ft/s): "))
+            )
+            velocities_08y_second.append(
+                float(input("Enter the velocity at 0.8Y depth for second point (in ft/s): "))
+            )
+            velocities_02y_first.append(
+                float(input("Enter the velocity at 0.2Y depth for first point (in ft/s): "))
+            )
+            velocities_02y_second.append(
+                float(input("Enter the velocity at 0.2Y depth for second point (in ft/s): "))
+            )
+
+    with stage("compute"):
+        count("points", num_points)
+        result = compute(
+            discharge_08y02y,
+            widths,
+            depths_first,
+            depths_second,
+            velocities_08y_first,
+            velocities_08y_second,
+            velocities_02y_first,
+            velocities_02y_second,
         )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
-        )
-        velocity_08y_first = float(
-            input("Enter the velocity at 0.8Y depth for first point (in ft/s): ")
-        )
-        velocity_08y_second = float(
-            input("Enter the velocity at 0.8Y depth for second point (in ft/s): ")
-        )
-        velocity_02y_first = float(
-            input("Enter the velocity at 0.2Y depth for first point (in ft/s): ")
-        )
-        velocity_02y_second = float(
-            input("Enter the velocity at 0.2Y depth for second point (in ft/s): ")
-        )
-        avg_velocity_first = (velocity_08y_first + velocity_02y_first) / 2
-        avg_velocity_second = (velocity_08y_second + velocity_02y_second) / 2
-        avg_velocity = (avg_velocity_first + avg_velocity_second) / 2
-        cross_section_area = ((depth_first + depth_second) / 2) * width
-        point_discharge = cross_section_area * avg_velocity
-        total_discharge += point_discharge
-
-        # Store values for plotting
-        depths.append((depth_first + depth_second) / 2)
-        velocities.append(avg_velocity)
-        discharges.append(point_discharge)
+        depths = (np.asarray(depths_first) + np.asarray(depths_second)) / 2
+        avg_velocities_first = (
+            np.asarray(velocities_08y_first) + np.asarray(velocities_02y_first)
+        ) / 2
+        avg_velocities_second = (
+            np.asarray(velocities_08y_second) + np.asarray(velocities_02y_second)
+        ) / 2
+        velocities = (avg_velocities_first + avg_velocities_second) / 2
 
     # Create plots
     points = list(range(1, num_points + 1))
-    plot_measurements(points, depths, velocities, discharges, "0.8Y/0.2Y Method")
+    plot_measurements(points, depths, velocities, result.discharges, "0.8Y/0.2Y Method")
 
-    return round(total_discharge, 4)
+    return round(result.total, 4)
 
 
 def calculate_discharge_surface(num_points):
@@ -156,75 +200,43 @@ def calculate_discharge_surface(num_points):
         input("\nEnter the conversion factor for surface velocity: ")
     )
     surface_velocity = float(input("Enter the measured surface velocity (in ft/s): "))
-    total_area = 0
-    depths = []
-    areas = []
-    discharges = []
-
-    for i in range(num_points):
-        width = float(input("\nEnter the width between measurement points (in feet): "))
-        depth_first = float(
-            input("Enter the depth at the first measurement point (in feet): ")
-        )
-        depth_second = float(
-            input("Enter the depth at the second measurement point (in feet): ")
+    widths = []
+    depths_first = []
+    depths_second = []
+
+    with stage("input"):
+        for i in range(num_points):
+            widths.append(
+                float(input("\nEnter the width between measurement points (in feet): "))
+            )
+            depths_first.append(
+                float(input("Enter the depth at the first measurement point (in feet): "))
+            )
+            depths_second.append(
+                float(input("Enter the depth at the second measurement point (in feet): "))
+            )
+
+    with stage("compute"):
+        count("points", num_points)
+        result = compute(
+            discharge_surface,
+            widths, depths_first, depths_second, conversion_factor, surface_velocity
         )
-        point_area = ((depth_first + depth_second) / 2) * width
-        total_area += point_area
-        point_discharge = conversion_factor * point_area * surface_velocity
-
-        # Store values for plotting
-        depths.append((depth_first + depth_second) / 2)
-        areas.append(point_area)
-        discharges.append(point_discharge)
+        depths = (np.asarray(depths_first) + np.asarray(depths_second)) / 2
+        areas = result.areas
+        discharges = result.discharges
 
     # Create plots
-    set_dark_theme()
-    points = list(range(1, num_points + 1))
-    plt.figure(figsize=(15, 10))
-
-    # Plot depths
-    plt.subplot(221)
-    plt.plot(points, depths, "-o", linewidth=2, markersize=8, color="#00BFFF")
-    plt.title("Depth Profile", fontsize=12, pad=15, color="white")
-    plt.xlabel("Measurement Points", fontsize=10)
-    plt.ylabel("Depth (ft)", fontsize=10)
-    plt.grid(True)
-
-    # Plot areas
-    plt.subplot(222)
-    plt.plot(points, areas, "-o", linewidth=2, markersize=8, color="#FF6B6B")
-    plt.title("Cross-sectional Area Profile", fontsize=12, pad=15, color="white")
-    plt.xlabel("Measurement Points", fontsize=10)
-    plt.ylabel("Area (sq ft)", fontsize=10)
-    plt.grid(True)
-
-    # Plot discharges
-    plt.subplot(223)
-    plt.plot(points, discharges, "-o", linewidth=2, markersize=8, color="#98FB98")
-    plt.title("Discharge Profile", fontsize=12, pad=15, color="white")
-    plt.xlabel("Measurement Points", fontsize=10)
-    plt.ylabel("Discharge (cusecs)", fontsize=10)
-    plt.grid(True)
-
-    # Plot cumulative discharge
-    plt.subplot(224)
-    cumulative_discharge = np.cumsum(discharges)
-    plt.plot(
-        points, cumulative_discharge, "-o", linewidth=2, markersize=8, color="#FF69B4"
-    )
-    plt.title("Cumulative Discharge", fontsize=12, pad=15, color="white")
-    plt.xlabel("Measurement Points", fontsize=10)
-    plt.ylabel("Cumulative Discharge (cusecs)", fontsize=10)
-    plt.grid(True)
+    import matplotlib.pyplot as plt
 
-    plt.suptitle(
-        "Flow Analysis - Surface Velocity Method", fontsize=14, y=0.95, color="white"
+    points = list(range(1, num_points + 1))
+    build_flow_figure(
+        points, depths, areas, discharges, "Surface Velocity Method", AREA_PANEL
     )
-    plt.tight_layout()
-    plt.show()
+    with stage("plt.show"):
+        plt.show()
 
-    return round(conversion_factor * total_area * surface_velocity, 4)
+    return round(result.total, 4)
 
 
 def main():
@@ -244,6 +256,9 @@ def main():
         print(
             f"\nTotal discharge calculated using surface velocity method: {discharge} cubic feet per second (cusecs)"
         )
+    if is_enabled():
+        print(f"\n{summary()}")
+        print(default_cache().summary())
 
 
 if __name__ == "__main__":
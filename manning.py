@@ -0,0 +1,134 @@
+"""Uniform-flow (Manning / Chezy) discharge and normal depth.
+
+Works on the cross-section geometry from geometry.py: a single CrossSection,
+or many channels at once through SectionStack.select(). Normal stages for
+every scenario are found together by a safeguarded Newton iteration that
+falls back to bisection whenever a step leaves the bracket.
+
+    python manning.py survey.csv --n 0.035 --slope 0.0004 --discharge 500 1000 2000
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from geometry import CrossSection, read_survey
+
+FORMULAS = ("manning", "chezy")
+# Unit constant of Manning's equation: 1.486 for feet (this project), 1.0 for metres
+K_US = 1.486
+K_SI = 1.0
+MAX_ITERATIONS = 100
+RTOL = 1e-10
+
+
+def manning_discharge(area, hydraulic_radius, n, slope, k: float = K_US):
+    return k / np.asarray(n) * area * np.asarray(hydraulic_radius) ** (2 / 3) * np.sqrt(slope)
+
+
+def chezy_discharge(area, hydraulic_radius, chezy_c, slope):
+    return np.asarray(chezy_c) * area * np.sqrt(np.asarray(hydraulic_radius) * slope)
+
+
+def discharge_at_stage(section, stage, roughness, slope, formula: str = "manning", k: float = K_US):
+    """Uniform-flow discharge; roughness is Manning's n or Chezy's C depending on formula"""
+    geometry = section.geometry(stage)
+    radius = geometry.hydraulic_radius
+    if formula == "manning":
+        return manning_discharge(geometry.area, radius, roughness, slope, k)
+    if formula == "chezy":
+        return chezy_discharge(geometry.area, radius, roughness, slope)
+    raise ValueError(f"Unknown formula {formula!r}; expected one of {FORMULAS}")
+
+
+def normal_stage(
+    section,
+    discharge,
+    roughness,
+    slope,
+    formula: str = "manning",
+    k: float = K_US,
+    rtol: float = RTOL,
+    max_iterations: int = MAX_ITERATIONS,
+):
+    """Water surface elevation carrying each discharge in uniform flow
+
+    discharge, roughness, slope (and the channels of a StackedChannels
+    section) broadcast together; every scenario is iterated at once.
+    """
+    target = np.asarray(discharge, dtype=np.float64)
+    if (target < 0).any():
+        raise ValueError("Discharge must be non-negative")
+    bottom = np.asarray(section.bottom, dtype=np.float64)
+    shape = np.broadcast_shapes(target.shape, np.shape(roughness), np.shape(slope), bottom.shape)
+    target = np.broadcast_to(target, shape)
+    bottom = np.broadcast_to(bottom, shape)
+
+    def flow(h):
+        return discharge_at_stage(section, h, roughness, slope, formula, k)
+
+    # Bracket: the bed carries nothing; double the depth until the flow is enough
+    lo = bottom.copy()
+    hi = bottom + 1.0
+    for _ in range(60):
+        short = flow(hi) < target
+        if not short.any():
+            break
+        hi = np.where(short, bottom + 2 * (hi - bottom), hi)
+
+    h = (lo + hi) / 2
+    for _ in range(max_iterations):
+        q = flow(h)
+        error = q - target
+        done = np.abs(error) <= rtol * np.maximum(target, 1e-12)
+        if done.all():
+            break
+        lo = np.where(error < 0, h, lo)
+        hi = np.where(error > 0, h, hi)
+        step = 1e-7 * np.maximum(1.0, np.abs(h))
+        slope_q = (flow(h + step) - q) / step
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = h - error / slope_q
+        inside = (slope_q > 0) & (newton > lo) & (newton < hi)
+        h = np.where(done, h, np.where(inside, newton, (lo + hi) / 2))
+    return np.where(target == 0, bottom, h)
+
+
+def normal_depth(section, discharge, roughness, slope, formula: str = "manning", k: float = K_US):
+    """Depth above the lowest bed point at which each discharge flows uniformly"""
+    return normal_stage(section, discharge, roughness, slope, formula, k) - np.asarray(section.bottom)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("survey", help="CSV with station and bed columns")
+    parser.add_argument("--formula", choices=FORMULAS, default="manning")
+    parser.add_argument("--n", "--roughness", dest="roughness", type=float, required=True,
+                        help="Manning's n, or Chezy's C with --formula chezy")
+    parser.add_argument("--slope", type=float, required=True, help="Energy (bed) slope")
+    parser.add_argument("--si", action="store_true", help="Survey is in metres rather than feet")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--discharge", type=float, nargs="+", help="Solve the normal stage for these discharges")
+    group.add_argument("--stage", type=float, nargs="+", help="Compute the discharge at these stages")
+    args = parser.parse_args(argv)
+
+    try:
+        section = CrossSection(*read_survey(args.survey))
+    except (KeyError, ValueError) as e:
+        print(f"Error reading {args.survey}: {e}")
+        sys.exit(1)
+    k = K_SI if args.si else K_US
+
+    if args.discharge:
+        discharges = np.asarray(args.discharge)
+        stages = normal_stage(section, discharges, args.roughness, args.slope, args.formula, k)
+    else:
+        stages = np.asarray(args.stage)
+        discharges = discharge_at_stage(section, stages, args.roughness, args.slope, args.formula, k)
+    print(f"{'Stage':>10} {'Depth':>10} {'Discharge':>12}")
+    for stage, discharge in zip(stages, discharges):
+        print(f"{stage:>10.4f} {stage - section.bottom:>10.4f} {discharge:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import numpy as np
+
+# Same names as the batch.py station file columns
+COLUMNS = (
+    "width",
+    "depth1",
+    "depth2",
+    "vel1",
+    "vel2",
+    "vel_08_1",
+    "vel_08_2",
+    "vel_02_1",
+    "vel_02_2",
+    "surface_velocity",
+)
+
+
+class MeasurementStore:
+    """Growable struct-of-arrays storage for measurement points
+
+    Each column is one contiguous row of a preallocated 2-D array, so
+    column() hands out NumPy views without copying. Columns a method does
+    not use can be left out entirely, or stay NaN.
+    """
+
+    def __init__(self, columns=COLUMNS, capacity: int = 64, dtype=np.float64):
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.full((len(self.columns), max(capacity, 1)), np.nan, dtype=dtype)
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, dtype=np.float64, **columns):
+        """Build a store holding exactly the given columns"""
+        size = len(next(iter(columns.values()))) if columns else 0
+        store = cls(columns.keys(), capacity=size, dtype=dtype)
+        store.extend(**columns)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def reserve(self, capacity: int):
+        """Grow the backing array to hold at least capacity points"""
+        if capacity <= self.capacity:
+            return
+        data = np.full((len(self.columns), capacity), np.nan, dtype=self._data.dtype)
+        data[:, : self._size] = self._data[:, : self._size]
+        self._data = data
+
+    def _grow_for(self, extra: int):
+        needed = self._size + extra
+        if needed > self.capacity:
+            self.reserve(max(needed, 2 * self.capacity))
+
+    def append(self, **values):
+        """Add one measurement point; missing columns are left as NaN"""
+        self._grow_for(1)
+        for name, value in values.items():
+            self._data[self._index[name], self._size] = value
+        self._size += 1
+
+    def extend(self, **columns):
+        """Add many measurement points from equal-length arrays"""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        count = lengths.pop() if lengths else 0
+        self._grow_for(count)
+        for name, values in columns.items():
+            self._data[self._index[name], self._size : self._size + count] = values
+        self._size += count
+
+    def set(self, index: int, **values):
+        """Overwrite columns of an existing measurement point"""
+        if not 0 <= index < self._size:
+            raise IndexError(f"Measurement point {index} out of range")
+        for name, value in values.items():
+            self._data[self._index[name], index] = value
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one column"""
+        return self._data[self._index[name], : self._size]
+
+    def clear(self):
+        self._data[:, : self._size] = np.nan
+        self._size = 0
@@ -0,0 +1,102 @@
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import instrumentation
+from batch import (
+    DEFAULT_CHUNK_SIZE,
+    EXCEL_EXTENSIONS,
+    chunk_totals,
+    merge_totals,
+    read_chunks,
+    read_records,
+)
+
+
+def read_records_raw(f):
+    """Yield the raw text of each CSV record, joining lines inside quoted fields
+
+    Quotes are escaped by doubling, so a record is complete once it holds an
+    even number of quote characters.
+    """
+    record = ""
+    for line in f:
+        record += line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = ""
+    if record:
+        yield record
+
+
+def read_line_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield (header, raw records) blocks so CSV parsing happens in the workers"""
+    with open(path, newline="") as f:
+        records = read_records_raw(f)
+        header_line = next(records, None)
+        if header_line is None:
+            return
+        header = next(csv.reader([header_line]))
+        while True:
+            lines = list(islice(records, chunk_size))
+            if not lines:
+                return
+            yield header, lines
+
+
+def csv_chunk_totals(task):
+    header, lines = task
+    return chunk_totals(list(csv.DictReader(lines, fieldnames=header)))
+
+
+def profiled_call(task):
+    """Run fn(task) in a worker with profiling on and return its stages with the result"""
+    fn, task = task
+    instrumentation.enable()
+    instrumentation.reset()
+    return fn(task), instrumentation.drain()
+
+
+def ordered_map(executor, fn, tasks, max_pending: int):
+    """Like executor.map, but keeps at most max_pending tasks in flight"""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def process_file_parallel(
+    path: str, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """Shard a station file across a process pool and yield one result per section
+
+    Each chunk of rows is reduced to partial section totals by a worker, and
+    the partials are merged in file order, so the output matches the serial
+    process_records exactly for any worker count or chunk size.
+    """
+    if path.lower().endswith(EXCEL_EXTENSIONS):
+        tasks = read_chunks(read_records(path), chunk_size)
+        fn = chunk_totals
+    else:
+        tasks = read_line_chunks(path, chunk_size)
+        fn = csv_chunk_totals
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if instrumentation.is_enabled():
+            # Worker timings would be lost in the workers; bring them back with each partial
+            profiled = ordered_map(executor, profiled_call, ((fn, task) for task in tasks), max_pending=2 * workers)
+            partials = (_merged(partial, recorded) for partial, recorded in profiled)
+        else:
+            partials = ordered_map(executor, fn, tasks, max_pending=2 * workers)
+        yield from merge_totals(partials)
+
+
+def _merged(partial, recorded):
+    instrumentation.merge(*recorded)
+    return partial
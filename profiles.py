@@ -0,0 +1,149 @@
+import numpy as np
+from typing import NamedTuple
+
+from discharge_kernel import SectionResult, discharge_0_6y, pair_verticals
+
+# Positions are relative depths below the surface: 0 = surface, 1 = bed
+INTEGRATIONS = ("trapezoid", "log")
+
+
+class VelocityProfiles(NamedTuple):
+    """Velocity readings of many verticals in one CSR-style ragged layout
+
+    Vertical i owns positions[offsets[i]:offsets[i + 1]] and the matching
+    velocities, sorted from surface to bed. A vertical may have any number
+    of readings, including none (e.g. a dry bank).
+    """
+
+    positions: np.ndarray
+    velocities: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def vertical(self, i: int):
+        part = slice(self.offsets[i], self.offsets[i + 1])
+        return self.positions[part], self.velocities[part]
+
+    def vertical_ids(self) -> np.ndarray:
+        """Index of the vertical every reading belongs to"""
+        return np.repeat(np.arange(len(self)), self.counts)
+
+    @classmethod
+    def from_long(cls, vertical, positions, velocities, n_verticals: int = None):
+        """Build from one row per reading (e.g. an ADCP export), in any order"""
+        vertical = np.asarray(vertical, dtype=np.intp)
+        positions = np.asarray(positions, dtype=np.float64)
+        velocities = np.asarray(velocities, dtype=np.float64)
+        if ((positions < 0) | (positions > 1)).any():
+            raise ValueError("Reading positions must be relative depths between 0 and 1")
+        n = n_verticals if n_verticals is not None else (int(vertical.max()) + 1 if vertical.size else 0)
+        counts = np.bincount(vertical, minlength=n)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        step = np.diff(vertical)
+        if (step < 0).any() or ((step == 0) & (np.diff(positions) < 0)).any():
+            order = np.lexsort((positions, vertical))
+            positions, velocities = positions[order], velocities[order]
+        return cls(positions, velocities, offsets)
+
+    @classmethod
+    def from_lists(cls, profiles):
+        """Build from a sequence of (positions, velocities) pairs, one per vertical"""
+        profiles = list(profiles)
+        counts = [len(p) for p, _ in profiles]
+        vertical = np.repeat(np.arange(len(profiles)), counts)
+        positions = np.concatenate([np.asarray(p, dtype=np.float64) for p, _ in profiles] or [[]])
+        velocities = np.concatenate([np.asarray(v, dtype=np.float64) for _, v in profiles] or [[]])
+        return cls.from_long(vertical, positions, velocities, len(profiles))
+
+    @classmethod
+    def from_0_6y(cls, velocities):
+        """One reading per vertical at 0.6 of the depth"""
+        velocities = np.asarray(velocities, dtype=np.float64)
+        n = len(velocities)
+        return cls(np.full(n, 0.6), velocities, np.arange(n + 1))
+
+    @classmethod
+    def from_08y02y(cls, vel_02, vel_08):
+        """Readings at 0.2 and 0.8 of the depth for every vertical"""
+        n = len(vel_02)
+        velocities = np.column_stack([vel_02, vel_08]).astype(np.float64).ravel()
+        return cls(np.tile([0.2, 0.8], n), velocities, np.arange(0, 2 * n + 1, 2))
+
+
+def mean_velocity_trapezoid(profiles: VelocityProfiles) -> np.ndarray:
+    """Depth-averaged velocity of every vertical by the trapezoidal rule
+
+    The top and bottom readings are held constant up to the surface and down
+    to the bed, so a single 0.6 reading gives that velocity and the 0.2/0.8
+    pair gives their average, matching the classic methods.
+    """
+    n = len(profiles)
+    p, v, offsets = profiles.positions, profiles.velocities, profiles.offsets
+    counts = profiles.counts
+    ids = profiles.vertical_ids()
+
+    same = ids[1:] == ids[:-1]
+    pieces = (p[1:] - p[:-1]) * (v[1:] + v[:-1]) / 2
+    integral = np.bincount(ids[:-1][same], weights=pieces[same], minlength=n).astype(np.float64)
+
+    has = counts > 0
+    first, last = offsets[:-1][has], offsets[1:][has] - 1
+    integral[has] += v[first] * p[first] + v[last] * (1 - p[last])
+    return integral
+
+
+def mean_velocity_log(profiles: VelocityProfiles, depths) -> np.ndarray:
+    """Depth-averaged velocity from a logarithmic profile fitted to every vertical
+
+    Fits u = A + B ln(z) against height above the bed z, all verticals in one
+    set of weighted sums, and integrates it over the depth: A + B (ln D - 1).
+    Verticals with fewer than two readings above the bed fall back to the
+    trapezoidal rule.
+    """
+    depths = np.asarray(depths, dtype=np.float64)
+    n = len(profiles)
+    ids = profiles.vertical_ids()
+    height = (1 - profiles.positions) * depths[ids]
+    above = height > 0
+    ids, x, y = ids[above], np.log(height[above]), profiles.velocities[above]
+
+    count = np.bincount(ids, minlength=n).astype(np.float64)
+    sx, sy = np.bincount(ids, x, n), np.bincount(ids, y, n)
+    sxx, sxy = np.bincount(ids, x * x, n), np.bincount(ids, x * y, n)
+    denom = count * sxx - sx**2
+
+    fitted = (count >= 2) & (denom > 1e-12 * np.maximum(count * sxx, 1.0)) & (depths > 0)
+    mean = mean_velocity_trapezoid(profiles)
+    c, d = count[fitted], denom[fitted]
+    slope = (c * sxy[fitted] - sx[fitted] * sy[fitted]) / d
+    intercept = (sy[fitted] - slope * sx[fitted]) / c
+    mean[fitted] = intercept + slope * (np.log(depths[fitted]) - 1)
+    return mean
+
+
+def mean_velocities(profiles: VelocityProfiles, depths=None, integration: str = "trapezoid"):
+    if integration == "trapezoid":
+        return mean_velocity_trapezoid(profiles)
+    if integration == "log":
+        if depths is None:
+            raise ValueError("The log-law integration needs the depth of every vertical")
+        return mean_velocity_log(profiles, depths)
+    raise ValueError(f"Unknown integration {integration!r}; expected one of {INTEGRATIONS}")
+
+
+def discharge_profiles(widths, depths, profiles: VelocityProfiles, integration: str = "trapezoid") -> SectionResult:
+    """Discharge of every segment from per-vertical depths and velocity profiles
+
+    depths and profiles are per vertical (one more than widths); each segment
+    uses the average of its two verticals' depth-averaged velocities.
+    """
+    if len(profiles) != len(depths):
+        raise ValueError("There must be one velocity profile per vertical")
+    mean = mean_velocities(profiles, depths, integration)
+    return discharge_0_6y(widths, *pair_verticals(depths), *pair_verticals(mean))
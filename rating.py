@@ -0,0 +1,251 @@
+"""Stage-discharge rating curves fitted from gaugings.
+
+Fits Q = a * (h - h0) ** b, optionally in several stage ranges, from
+measured (stage, discharge) pairs and converts logged stages to discharge
+through a precomputed uniform-grid lookup table.
+
+    python rating.py fit gaugings.csv --breakpoints 2.5 -o ratings.json
+    python rating.py apply ratings.json --station S1 stages.txt -o flows.txt
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+# Candidate offsets h0 tried per refinement pass, and how many passes
+H0_CANDIDATES = 64
+H0_PASSES = 4
+MIN_POINTS = 3
+DEFAULT_TABLE_STEP = 0.001
+
+
+class RatingSegment(NamedTuple):
+    lower: float  # segment applies from this stage ...
+    upper: float  # ... up to (not including) this one
+    a: float
+    h0: float
+    b: float
+
+    def discharge(self, stage):
+        return self.a * np.clip(np.asarray(stage, dtype=np.float64) - self.h0, 0.0, None) ** self.b
+
+
+class RatingCurve(NamedTuple):
+    segments: Tuple[RatingSegment, ...]
+
+    @property
+    def lower(self) -> float:
+        return self.segments[0].lower
+
+    @property
+    def upper(self) -> float:
+        return self.segments[-1].upper
+
+    def discharge(self, stage) -> np.ndarray:
+        """Evaluate the power laws directly; stages outside the fitted range give NaN"""
+        stage = np.asarray(stage, dtype=np.float64)
+        uppers = np.array([s.upper for s in self.segments])
+        which = np.minimum(np.searchsorted(uppers, stage, side="right"), len(uppers) - 1)
+        a, h0, b = (np.array([getattr(s, f) for s in self.segments])[which] for f in ("a", "h0", "b"))
+        q = a * np.clip(stage - h0, 0.0, None) ** b
+        return np.where((stage >= self.lower) & (stage <= self.upper), q, np.nan)
+
+    def to_dict(self) -> dict:
+        return {"segments": [s._asdict() for s in self.segments]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RatingCurve":
+        return cls(tuple(RatingSegment(**s) for s in data["segments"]))
+
+
+def _log_fits(stage, discharge, h0):
+    """Least-squares log a and b for every candidate h0 at once, with their errors"""
+    x = np.log(stage[None, :] - h0[:, None])
+    y = np.log(discharge)[None, :]
+    x_mean, y_mean = x.mean(axis=1, keepdims=True), y.mean(axis=1, keepdims=True)
+    sxx = ((x - x_mean) ** 2).sum(axis=1)
+    b = ((x - x_mean) * (y - y_mean)).sum(axis=1) / sxx
+    log_a = y_mean[:, 0] - b * x_mean[:, 0]
+    residuals = y - (log_a[:, None] + b[:, None] * x)
+    return log_a, b, (residuals**2).sum(axis=1)
+
+
+def fit_power_law(stage, discharge, h0=None):
+    """Fit Q = a (h - h0)^b; returns (a, h0, b)
+
+    With h0 fixed this is a straight line in log space. Otherwise h0 is
+    searched below the lowest stage on a grid that is refined around the
+    best candidate, each pass evaluating every candidate in one array op.
+    """
+    stage = np.asarray(stage, dtype=np.float64)
+    discharge = np.asarray(discharge, dtype=np.float64)
+    if len(stage) < MIN_POINTS:
+        raise ValueError(f"At least {MIN_POINTS} gaugings are needed to fit a rating")
+    if (discharge <= 0).any():
+        raise ValueError("Discharges must be positive to fit a power law")
+
+    if h0 is not None:
+        if h0 >= stage.min():
+            raise ValueError("h0 must be below every gauged stage")
+        log_a, b, _ = _log_fits(stage, discharge, np.array([h0], dtype=np.float64))
+        return float(np.exp(log_a[0])), float(h0), float(b[0])
+
+    h_min = stage.min()
+    span = max(np.ptp(stage), abs(h_min), 1.0)
+    lo, hi = h_min - 2 * span, h_min - 1e-6 * span
+    for _ in range(H0_PASSES):
+        candidates = np.linspace(lo, hi, H0_CANDIDATES)
+        log_a, b, sse = _log_fits(stage, discharge, candidates)
+        best = int(np.nanargmin(sse))
+        step = candidates[1] - candidates[0]
+        lo, hi = candidates[best] - step, min(candidates[best] + step, h_min - 1e-9 * span)
+    return float(np.exp(log_a[best])), float(candidates[best]), float(b[best])
+
+
+def fit_rating(stage, discharge, breakpoints=()) -> RatingCurve:
+    """Fit one power law per stage range split at the given breakpoints"""
+    stage = np.asarray(stage, dtype=np.float64)
+    discharge = np.asarray(discharge, dtype=np.float64)
+    edges = [float(stage.min())] + sorted(float(b) for b in breakpoints) + [float(stage.max())]
+    segments = []
+    for i, (lower, upper) in enumerate(zip(edges[:-1], edges[1:])):
+        last = i == len(edges) - 2
+        inside = (stage >= lower) & ((stage <= upper) if last else (stage < upper))
+        if inside.sum() < MIN_POINTS:
+            raise ValueError(f"Stage range {lower:g}-{upper:g} has fewer than {MIN_POINTS} gaugings")
+        a, h0, b = fit_power_law(stage[inside], discharge[inside])
+        segments.append(RatingSegment(lower, upper, a, h0, b))
+    return RatingCurve(tuple(segments))
+
+
+class RatingTable:
+    """Discharge sampled on a uniform stage grid for fast vectorized lookups
+
+    A lookup is index arithmetic plus one linear interpolation per stage,
+    so millions of readings convert in a single call.
+    """
+
+    def __init__(self, curve: RatingCurve, step: float = DEFAULT_TABLE_STEP):
+        self.curve = curve
+        self.start = curve.lower
+        self.step = step
+        n = int(np.ceil((curve.upper - curve.lower) / step)) + 1
+        self.stages = self.start + step * np.arange(n)
+        self.discharges = curve.discharge(np.minimum(self.stages, curve.upper))
+
+    def __call__(self, stage) -> np.ndarray:
+        """Discharge for every stage; stages outside the rated range give NaN"""
+        stage = np.asarray(stage, dtype=np.float64)
+        position = (stage - self.start) / self.step
+        index = np.clip(position.astype(np.intp), 0, len(self.stages) - 2)
+        frac = position - index
+        q = self.discharges[index] * (1 - frac) + self.discharges[index + 1] * frac
+        return np.where((stage >= self.curve.lower) & (stage <= self.curve.upper), q, np.nan)
+
+
+def gaugings_hash(stage, discharge, breakpoints=()) -> str:
+    digest = hashlib.sha256()
+    for values in (stage, discharge, breakpoints):
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class RatingStore:
+    """Fitted coefficients per station in a JSON file, refitted only when the gaugings change"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ratings = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._ratings = json.load(f)
+        self._tables = {}
+
+    def stations(self):
+        return sorted(self._ratings)
+
+    def curve(self, station: str) -> RatingCurve:
+        try:
+            return RatingCurve.from_dict(self._ratings[station])
+        except KeyError:
+            raise KeyError(f"No rating stored for station {station!r}")
+
+    def fit(self, station: str, stage, discharge, breakpoints=()) -> RatingCurve:
+        key = gaugings_hash(stage, discharge, sorted(breakpoints))
+        cached = self._ratings.get(station)
+        if cached is not None and cached.get("gaugings") == key:
+            return RatingCurve.from_dict(cached)
+        curve = fit_rating(stage, discharge, breakpoints)
+        self._ratings[station] = dict(curve.to_dict(), gaugings=key)
+        self._tables.pop(station, None)
+        return curve
+
+    def table(self, station: str, step: float = DEFAULT_TABLE_STEP) -> RatingTable:
+        table = self._tables.get(station)
+        if table is None or table.step != step:
+            table = self._tables[station] = RatingTable(self.curve(station), step)
+        return table
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._ratings, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def read_gaugings(path: str):
+    """station -> (stages, discharges) from a CSV with station, stage and discharge columns"""
+    gaugings = defaultdict(lambda: ([], []))
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            stages, discharges = gaugings[row["station"]]
+            stages.append(float(row["stage"]))
+            discharges.append(float(row["discharge"]))
+    return {station: (np.array(h), np.array(q)) for station, (h, q) in gaugings.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("fit", help="Fit a rating per station from a gaugings CSV")
+    fit.add_argument("gaugings", help="CSV with station, stage and discharge columns")
+    fit.add_argument("--breakpoints", type=float, nargs="*", default=[], help="Stages splitting the rating")
+    fit.add_argument("-o", "--output", default="ratings.json")
+    apply = commands.add_parser("apply", help="Convert logged stages to discharge")
+    apply.add_argument("ratings")
+    apply.add_argument("stages", help=".npy file or text file with one stage per line")
+    apply.add_argument("--station", required=True)
+    apply.add_argument("--step", type=float, default=DEFAULT_TABLE_STEP, help="Lookup table stage step")
+    apply.add_argument("-o", "--output", default="flows.txt")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "fit":
+            store = RatingStore(args.output)
+            for station, (stage, discharge) in sorted(read_gaugings(args.gaugings).items()):
+                curve = store.fit(station, stage, discharge, args.breakpoints)
+                for s in curve.segments:
+                    print(f"{station}: {s.lower:g}-{s.upper:g}  Q = {s.a:.4f} (h - {s.h0:.4f})^{s.b:.4f}")
+            store.save()
+            return
+        stages = np.load(args.stages) if args.stages.endswith(".npy") else np.loadtxt(args.stages)
+        flows = RatingStore(args.ratings).table(args.station, args.step)(stages)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.output.endswith(".npy"):
+        np.save(args.output, flows)
+    else:
+        np.savetxt(args.output, flows, fmt="%.4f")
+    print(f"Converted {len(stages)} stages ({int(np.isnan(flows).sum())} outside the rated range)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+import matplotlib
+
+# Reports are rendered on servers without a display
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from batch import (
+    compute_chunk,
+    read_records,
+    resolve_method,
+    section_key,
+    validate_chunk,
+)
+from main import AREA_PANEL, VELOCITY_PANEL, build_flow_figure
+from parallel import ordered_map
+
+FORMATS = ("png", "svg", "pdf")
+METHOD_TITLES = {
+    "0.6Y": "0.6Y Method",
+    "0.8Y/0.2Y": "0.8Y/0.2Y Method",
+    "surface": "Surface Velocity Method",
+}
+
+
+def read_sections(path: str):
+    """Yield (key, rows) for every station/section in a station file"""
+    for key, rows in groupby(read_records(path), key=section_key):
+        yield key, list(rows)
+
+
+SAFE_PART = re.compile(r"[A-Za-z0-9.-]+")
+
+
+def report_filename(key) -> str:
+    """File name for a (station, section, method) key
+
+    Methods come from a fixed set, but stations and sections that had to be
+    sanitized get a short hash of the original key.
+    """
+    name = re.sub(r"[^A-Za-z0-9.-]+", "_", "_".join(key)).strip("_")
+    if all(SAFE_PART.fullmatch(part) for part in key[:2]):
+        return name
+    # e.g. stations "A/B" and "A B" would both become "A_B"
+    digest = hashlib.sha1("\0".join(key).encode()).hexdigest()[:8]
+    return f"{name}-{digest}"
+
+
+def render_section(task):
+    """Compute one section and save its four-panel figure in every format"""
+    key, rows, out_dir, formats = task
+    method = resolve_method(key[2])
+    columns = validate_chunk(method, rows)
+    result = compute_chunk(method, columns)
+
+    widths, depths1, depths2, *velocities = columns
+    depths = (depths1 + depths2) / 2
+    if method == "surface":
+        values, panel = result.areas, AREA_PANEL
+    else:
+        values, panel = sum(velocities) / len(velocities), VELOCITY_PANEL
+    points = range(1, len(depths) + 1)
+
+    fig = build_flow_figure(
+        points, depths, values, result.discharges, METHOD_TITLES[method], panel
+    )
+    base = os.path.join(out_dir, report_filename((key[0], key[1], method)))
+    paths = []
+    for fmt in formats:
+        fig.savefig(f"{base}.{fmt}", format=fmt)
+        paths.append(f"{base}.{fmt}")
+    plt.close(fig)
+    return paths
+
+
+def export_reports(path: str, out_dir: str, formats=("png",), workers: int = None):
+    """Render every section of a station file across a process pool
+
+    Yields the written file paths per section, in file order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = (
+        (key, rows, out_dir, tuple(formats)) for key, rows in read_sections(path)
+    )
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(render_section, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from ordered_map(executor, render_section, tasks, max_pending=2 * workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export flow analysis figures for every station/section"
+    )
+    parser.add_argument("input", help="CSV or Excel file with one row per segment")
+    parser.add_argument(
+        "-o", "--output-dir", default="reports", help="Directory for figures"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        nargs="+",
+        choices=FORMATS,
+        default=["png"],
+        help="One or more output formats (default: png)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes; 0 uses every core (default: 0)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        count = 0
+        for paths in export_reports(
+            args.input, args.output_dir, args.format, args.workers or None
+        ):
+            count += len(paths)
+    except (KeyError, ValueError) as e:
+        print(f"Error processing {args.input}: {e}")
+        sys.exit(1)
+    print(f"Wrote {count} figures to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
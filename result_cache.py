@@ -0,0 +1,283 @@
+"""Content-addressed cache of discharge results.
+
+Results are keyed by a hash of the kernel, its inputs and the kernel source,
+so editing discharge_kernel.py invalidates everything it computed. An
+in-process LRU tier is bounded by bytes. An optional on-disk tier (shared by
+the CLI, batch runs, worker processes and the Streamlit app) is bounded by
+total size and evicts the least recently used files.
+
+The disk tier is enabled with DISCHARGE_CACHE_DIR (or batch.py --cache-dir);
+DISCHARGE_CACHE_MB and DISCHARGE_CACHE_DISK_MB set the two caps. Batch runs
+only use the cache when given a cache directory, since streamed chunks
+rarely repeat within a run.
+
+    python result_cache.py stats
+    python result_cache.py clear
+"""
+import argparse
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import discharge_kernel
+from discharge_kernel import SectionResult
+
+CACHE_FORMAT = 2
+DEFAULT_MEMORY_MB = 64
+DEFAULT_DISK_MB = 1024
+# Disk evictions go down to this fraction of the cap so they don't run on every write
+DISK_LOW_WATER = 0.9
+
+_code_version = None
+
+
+def code_version() -> str:
+    """Hash of the kernel source; part of every key"""
+    global _code_version
+    if _code_version is None:
+        with open(discharge_kernel.__file__, "rb") as f:
+            _code_version = hashlib.sha256(f.read() + str(CACHE_FORMAT).encode()).hexdigest()[:16]
+    return _code_version
+
+
+def cache_key(kernel, *args) -> str:
+    digest = hashlib.sha256(f"{kernel.__module__}.{kernel.__qualname__}\0{code_version()}".encode())
+    for arg in args:
+        values = np.ascontiguousarray(arg, dtype=np.float64)
+        digest.update(repr(values.shape).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _nbytes(result: SectionResult) -> int:
+    return result.areas.nbytes + result.discharges.nbytes + result.cumulative.nbytes + 64
+
+
+def _frozen(result: SectionResult) -> SectionResult:
+    """Cached arrays are shared between callers, so make them read-only"""
+    for values in (result.areas, result.discharges, result.cumulative):
+        values.flags.writeable = False
+    return result
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_MB * 2**20, disk_dir: str = None,
+                 disk_max_bytes: int = DEFAULT_DISK_MB * 2**20):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = None  # scanned on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    # --- Memory tier ---
+
+    def _remember(self, key: str, result: SectionResult):
+        size = _nbytes(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: SectionResult):
+        result = _frozen(result)
+        self._remember(key, result)
+        self._write_disk(key, result)
+
+    def compute(self, kernel, *args) -> SectionResult:
+        """kernel(*args), served from the cache when the same inputs were seen before"""
+        key = cache_key(kernel, *args)
+        result = self.get(key)
+        if result is None:
+            result = kernel(*args)
+            self.put(key, result)
+        return result
+
+    # --- Disk tier ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npy")
+
+    def _read_disk(self, key: str):
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            areas, discharges = np.load(path)
+            os.utime(path)  # recency for LRU eviction
+        except (OSError, ValueError):
+            return None
+        # Cumulative and total are rebuilt exactly as the kernel builds them
+        return _frozen(discharge_kernel._section_result(areas, discharges))
+
+    def _write_disk(self, key: str, result: SectionResult):
+        if self.disk_dir is None:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            # npz would be smaller but its zip overhead costs more than most sections take to compute
+            np.save(f, np.stack([result.areas, result.discharges]))
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._disk_files())
+            else:
+                self._disk_bytes += os.path.getsize(path)
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _disk_files(self):
+        """(mtime, path, size) of every cached file"""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".npy"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, path, stat.st_size))
+        return files
+
+    def _evict_disk(self):
+        files = sorted(self._disk_files())
+        total = sum(size for _, _, size in files)
+        target = self.disk_max_bytes * DISK_LOW_WATER
+        for _, path, size in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self, disk: bool = True):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.disk_dir is not None:
+            for _, path, _ in self._disk_files():
+                os.remove(path)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "evictions": self.evictions,
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"Result cache: {s['hits']} memory hits, {s['disk_hits']} disk hits, {s['misses']} misses "
+            f"({100 * s['hit_rate']:.1f}% hit rate), {s['entries']} entries / {s['memory_bytes'] / 2**20:.1f} MB, "
+            f"{s['evictions']} evictions, {s['disk_evictions']} disk evictions"
+        )
+
+
+_default = None
+
+
+def default_cache() -> ResultCache:
+    """The process-wide cache, configured from the environment on first use"""
+    global _default
+    if _default is None:
+        _default = ResultCache(
+            int(float(os.environ.get("DISCHARGE_CACHE_MB", DEFAULT_MEMORY_MB)) * 2**20),
+            os.environ.get("DISCHARGE_CACHE_DIR") or None,
+            int(float(os.environ.get("DISCHARGE_CACHE_DISK_MB", DEFAULT_DISK_MB)) * 2**20),
+        )
+    return _default
+
+
+def configure(disk_dir: str = None, max_bytes: int = DEFAULT_MEMORY_MB * 2**20, **kwargs) -> ResultCache:
+    """Replace the process-wide cache; the environment is updated so worker processes match"""
+    global _default
+    if disk_dir:
+        os.environ["DISCHARGE_CACHE_DIR"] = disk_dir
+    os.environ["DISCHARGE_CACHE_MB"] = str(max_bytes / 2**20)
+    _default = ResultCache(max_bytes, disk_dir, **kwargs)
+    return _default
+
+
+def has_disk_tier() -> bool:
+    """Whether a cache directory was given, in this process or the one that started it"""
+    return default_cache().disk_dir is not None
+
+
+def compute(kernel, *args) -> SectionResult:
+    return default_cache().compute(kernel, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("stats", "clear"))
+    parser.add_argument("--cache-dir", default=os.environ.get("DISCHARGE_CACHE_DIR"), help="Disk tier directory")
+    args = parser.parse_args(argv)
+    if not args.cache_dir:
+        parser.error("--cache-dir (or DISCHARGE_CACHE_DIR) is required")
+
+    cache = ResultCache(disk_dir=args.cache_dir)
+    files = cache._disk_files()
+    if args.command == "clear":
+        cache.clear()
+        print(f"Removed {len(files)} cached results from {args.cache_dir}")
+    else:
+        print(f"{len(files)} cached results, {sum(size for _, _, size in files) / 2**20:.1f} MB in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
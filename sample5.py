@@ -3,6 +3,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import List, Tuple
 
+from instrumentation import stage
+from schematic import draw_schematic
+
 # Page configuration
 st.set_page_config(
     page_title="Fluid Mechanics Discharge Calculator",
@@ -56,50 +59,26 @@ class DischargeCalculator:
             ax.set_ylabel("Depth (ft)", color="white")
             ax.invert_yaxis()
 
-            positions = [i * 20 for i in range(len(self.depths))]
-            mid_depths = [(d1 + d2) / 2 for d1, d2 in self.depths]
-            stream_bed = [min(d1, d2) for d1, d2 in self.depths]
-
-            # Plot stream bed with label
-            ax.plot(positions, stream_bed, color="#00ffff", linewidth=2, label="Stream Bed")
-
-            # Fill water area with label (only add label to first fill for legend)
-            for i, ((d1, d2), x) in enumerate(zip(self.depths, positions)):
-                avg_depth = (d1 + d2) / 2
-                if i == 0:
-                    ax.fill_between([x - 5, x + 5], 0, avg_depth, color="#005577", alpha=0.5, label="Water Area")
-                else:
-                    ax.fill_between([x - 5, x + 5], 0, avg_depth, color="#005577", alpha=0.5)
-
-                # Velocity arrows with method-specific color and label
-                if method_name == "0.6Y Method":
-                    v1, v2 = self.velocities[i]
-                    vel = (v1 + v2) / 2
-                    if i == 0:
-                        ax.arrow(x, avg_depth / 2, 0, -vel, head_width=2, head_length=0.5, fc="#ffcc00", ec="#ffcc00", label="Velocity (0.6Y)")
-                    else:
-                        ax.arrow(x, avg_depth / 2, 0, -vel, head_width=2, head_length=0.5, fc="#ffcc00", ec="#ffcc00")
-                elif method_name == "0.8Y/0.2Y Method":
-                    v1, v2, v3, v4 = self.velocities[i]
-                    vel = ((v1 + v3) / 2 + (v2 + v4) / 2) / 2
-                    if i == 0:
-                        ax.arrow(x, avg_depth / 2, 0, -vel, head_width=2, head_length=0.5, fc="#00ffcc", ec="#00ffcc", label="Velocity (0.8Y/0.2Y)")
-                    else:
-                        ax.arrow(x, avg_depth / 2, 0, -vel, head_width=2, head_length=0.5, fc="#00ffcc", ec="#00ffcc")
-                else:  # Surface Velocity Method
-                    surf_vel = self.discharges[-1] / sum(self.areas) if sum(self.areas) > 0 else 0
-                    if i == 0:
-                        ax.arrow(x, avg_depth / 2, 0, -surf_vel, head_width=2, head_length=0.5, fc="#ff00ff", ec="#ff00ff", label="Surface Velocity")
-                    else:
-                        ax.arrow(x, avg_depth / 2, 0, -surf_vel, head_width=2, head_length=0.5, fc="#ff00ff", ec="#ff00ff")
+            # Velocity arrows with method-specific values
+            if method_name == "0.6Y Method":
+                arrow_velocities = [(v1 + v2) / 2 for v1, v2 in self.velocities]
+            elif method_name == "0.8Y/0.2Y Method":
+                arrow_velocities = [((v1 + v3) / 2 + (v2 + v4) / 2) / 2 for v1, v2, v3, v4 in self.velocities]
+            else:  # Surface Velocity Method
+                surf_vel = self.discharges[-1] / sum(self.areas) if sum(self.areas) > 0 else 0
+                arrow_velocities = [surf_vel] * len(self.depths)
+
+            # Stream bed, water area and arrows drawn as single collections
+            handles = draw_schematic(ax, method_name, self.depths, arrow_velocities)
 
             ax.grid(True, alpha=0.3)
             # Add legend with white text
-            legend = ax.legend(facecolor="#1a1a1a", edgecolor="#333333", fontsize=12)
+            legend = ax.legend(handles=handles, facecolor="#1a1a1a", edgecolor="#333333", fontsize=12)
             for text in legend.get_texts():
                 text.set_color("white")
 
-            st.pyplot(fig)
+            with stage("st.pyplot"):
+                st.pyplot(fig)
             plt.close(fig)
 
         except Exception as e:
@@ -1,14 +1,141 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from typing import List
+
+from discharge_kernel import discharge_0_6y, discharge_08y02y, discharge_surface
+from incremental import IncrementalSection
+from instrumentation import count, is_enabled, stage, summary, timed
+from measurement_store import MeasurementStore
+from result_cache import default_cache
+from sweep import SurfaceSweep, SweepResult
+
+
+_theme_applied = False
+
+
+def apply_theme():
+    """Import the plotting stack and apply the dark theme once; only needed to draw figures"""
+    global _theme_applied
+    if _theme_applied:
+        return
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use("dark_background")
+    sns.set_theme(style="darkgrid", palette="dark")
+    for param in ["figure.facecolor", "axes.facecolor", "grid.color", "text.color", "axes.labelcolor", "xtick.color", "ytick.color"]:
+        plt.rcParams[param] = "#1a1a1a" if param in ["figure.facecolor", "axes.facecolor"] else "white"
+    _theme_applied = True
+
+# Bound the memoized results so long sessions don't grow without limit
+CACHE_MAX_ENTRIES = 128
+CACHE_TTL_SECONDS = 3600
+MEASUREMENT_COLUMNS = {
+    "width": st.column_config.NumberColumn("Width between points (ft)", min_value=0.0, default=0.0),
+    "depth1": st.column_config.NumberColumn("Depth at first point (ft)", min_value=0.0, default=0.0),
+    "depth2": st.column_config.NumberColumn("Depth at second point (ft)", min_value=0.0, default=0.0),
+    "vel1": st.column_config.NumberColumn("Velocity at 0.6Y, first point (ft/s)", min_value=0.0, default=0.0),
+    "vel2": st.column_config.NumberColumn("Velocity at 0.6Y, second point (ft/s)", min_value=0.0, default=0.0),
+    "vel_08_1": st.column_config.NumberColumn("Velocity at 0.8Y, first point (ft/s)", min_value=0.0, default=0.0),
+    "vel_08_2": st.column_config.NumberColumn("Velocity at 0.8Y, second point (ft/s)", min_value=0.0, default=0.0),
+    "vel_02_1": st.column_config.NumberColumn("Velocity at 0.2Y, first point (ft/s)", min_value=0.0, default=0.0),
+    "vel_02_2": st.column_config.NumberColumn("Velocity at 0.2Y, second point (ft/s)", min_value=0.0, default=0.0),
+}
+# Same column names as the batch.py station files, so sheets can be uploaded as-is
+VELOCITY_COLUMNS = {
+    "0.6Y Method": ["vel1", "vel2"],
+    "0.8Y/0.2Y Method": ["vel_08_1", "vel_08_2", "vel_02_1", "vel_02_2"],
+    "Surface Velocity Method": [],
+}
+KERNELS = {
+    "0.6Y Method": discharge_0_6y,
+    "0.8Y/0.2Y Method": discharge_08y02y,
+    "Surface Velocity Method": discharge_surface,
+}
+
+
+def compute_discharge(method_name: str, *columns):
+    """Per-section areas and discharges from the result cache shared with the CLI and batch runs"""
+    return default_cache().compute(KERNELS[method_name], *columns)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def render_schematic(method_name: str, depth1: np.ndarray, depth2: np.ndarray, arrow_velocities: np.ndarray) -> bytes:
+    """Render the schematic diagram to PNG, memoized on the plotted values"""
+    apply_theme()
+    from matplotlib.figure import Figure
+    from schematic import draw_schematic
+
+    fig = Figure(figsize=(12, 6), facecolor="#1a1a1a")
+    ax = fig.subplots()
+    ax.set_facecolor("#1a1a1a")
+    ax.set_title(f"Schematic Diagram - {method_name}", color="white", pad=20)
+    ax.set_xlabel("Position across stream (20 ft interval)", color="white")
+    ax.set_ylabel("Depth (ft)", color="white")
+    ax.invert_yaxis()
+
+    handles = draw_schematic(ax, method_name, np.column_stack([depth1, depth2]), arrow_velocities)
+
+    ax.grid(True, alpha=0.3)
+    legend = ax.legend(handles=handles, facecolor="#1a1a1a", edgecolor="#333333", fontsize=12)
+    for text in legend.get_texts():
+        text.set_color("white")
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def render_sweep_heatmap(factors: np.ndarray, velocities: np.ndarray, discharges: np.ndarray) -> bytes:
+    """Render the conversion factor sweep heatmap to PNG, memoized on the grid"""
+    apply_theme()
+    from matplotlib.figure import Figure
+    from sweep import draw_sweep_heatmap
+
+    fig = Figure(figsize=(12, 5), facecolor="#1a1a1a")
+    ax = fig.subplots()
+    mesh = draw_sweep_heatmap(ax, SweepResult(factors, velocities, discharges))
+    fig.colorbar(mesh, ax=ax, label="Discharge (cusecs)")
+    ax.set_title("Discharge by conversion factor and surface velocity", color="white")
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+def measurement_errors(table: pd.DataFrame, columns: List[str]):
+    """Why the table can't be used, or None; the same checks as batch.validate_chunk"""
+    missing = [col for col in columns if col not in table.columns]
+    if missing:
+        return f"missing column(s) {', '.join(missing)}"
+    for col in columns:
+        try:
+            values = table[col].to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            return f"non-numeric value in column {col!r}"
+        bad = ~np.isfinite(values) | (values < 0)
+        if bad.any():
+            return f"invalid {col} in row {np.argmax(bad) + 1}: values must be finite and non-negative"
+    return None
+
+
+def manual_table(method_name: str, columns: List[str], n_points: int) -> pd.DataFrame:
+    """The hand-entered table: the last edited rows, padded with zeros or trimmed to n_points
+
+    The editor keeps its edits only while its input is unchanged, so the
+    input is rebuilt from the edited rows only when n_points changes.
+    """
+    saved = st.session_state.get(f"rows_{method_name}")
+    if saved is None or saved[0] != n_points:
+        table = pd.DataFrame(0.0, index=range(n_points), columns=columns)
+        edited = st.session_state.get(f"edited_{method_name}")
+        if edited is not None:
+            kept = edited[columns].to_numpy()[:n_points]
+            table.iloc[: len(kept)] = kept
+        saved = st.session_state[f"rows_{method_name}"] = (n_points, table)
+    return saved[1]
 
-# Page configuration and theme settings
-st.set_page_config(page_title="Fluid Mechanics Discharge Calculator", page_icon="🌊", layout="wide")
-plt.style.use("dark_background")
-sns.set_theme(style="darkgrid", palette="dark")
-for param in ["figure.facecolor", "axes.facecolor", "grid.color", "text.color", "axes.labelcolor", "xtick.color", "ytick.color"]:
-    plt.rcParams[param] = "#1a1a1a" if param in ["figure.facecolor", "axes.facecolor"] else "white"
 
 class DischargeCalculator:
     def __init__(self):
@@ -16,182 +143,148 @@ class DischargeCalculator:
 
     def reset(self):
         """Reset all calculator data"""
-        self.depths = []
-        self.velocities = []
-        self.discharges = []
-        self.widths = []
-        self.areas = []
-
-    def get_measurements(self, point_num: int):
-        """Get width and depth measurements for a point"""
-        st.subheader(f"Measurement Point {point_num}")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            width = st.number_input("Width between points (ft)", min_value=0.0, key=f"width_{point_num}")
-        with col2:
-            depth1 = st.number_input("Depth at first point (ft)", min_value=0.0, key=f"depth1_{point_num}")
-        with col3:
-            depth2 = st.number_input("Depth at second point (ft)", min_value=0.0, key=f"depth2_{point_num}")
-
-        self.widths.append(width)
-        self.depths.append((depth1, depth2))
-        return width, depth1, depth2
+        self.store = MeasurementStore()
+        self.result = None
+        self.deltas = []
+
+    def get_measurement_table(self, method_name: str, n_points: int, uploaded=None) -> MeasurementStore:
+        """Editable table with one row per measurement point, loaded into the columnar store"""
+        columns = ["width", "depth1", "depth2"] + VELOCITY_COLUMNS[method_name]
+        self.store = MeasurementStore()
+        if uploaded is not None:
+            try:
+                table = pd.read_csv(uploaded)
+            except ValueError as e:
+                st.error(f"Could not read {uploaded.name}: {e}")
+                return self.store
+            error = measurement_errors(table, columns)
+            if error:
+                st.error(f"Could not use {uploaded.name}: {error}")
+                return self.store
+            table = table[columns].astype(float)
+            source = uploaded.name
+        else:
+            table = manual_table(method_name, columns, n_points)
+            source = "manual"
+
+        with stage("data_editor"):
+            table = st.data_editor(
+                table,
+                column_config={col: MEASUREMENT_COLUMNS[col] for col in columns},
+                num_rows="dynamic",
+                hide_index=True,
+                key=f"table_{method_name}_{source}",
+            )
+        # Cells cleared in the editor count as zero, like the column defaults
+        table = table.fillna(0.0)
+        error = measurement_errors(table, columns)
+        if error:
+            st.error(f"Invalid measurement: {error}")
+            return self.store
+        if uploaded is None:
+            st.session_state[f"edited_{method_name}"] = table.reset_index(drop=True)
+
+        self.store = MeasurementStore.from_columns(**{col: table[col].to_numpy(dtype=np.float64) for col in columns})
+        count("points", len(self.store))
+        return self.store
+
+    def section_columns(self, method_name: str) -> List[np.ndarray]:
+        """Zero-copy column views in the order the discharge kernels expect"""
+        return [self.store[col] for col in ["width", "depth1", "depth2"] + VELOCITY_COLUMNS[method_name]]
+
+    @timed("compute")
+    def incremental_result(self, method_name: str, *params):
+        """Apply edited rows to the session's incremental engine, rebuilding only when the shape changes"""
+        columns = self.section_columns(method_name)
+        key = f"incremental_{method_name}"
+        engine = st.session_state.get(key)
+        if engine is None or not engine.compatible(len(self.store), *params):
+            result = compute_discharge(method_name, *columns, *params)
+            st.session_state[key] = IncrementalSection(KERNELS[method_name], columns, *params, result=result)
+            return result
+
+        self.deltas = engine.apply(columns)
+        return engine.result()
 
     def calc_area(self, width, depth1, depth2):
         """Calculate area using average depth * width"""
         return ((depth1 + depth2) / 2) * width
 
-    def plot_schematic(self, method_name: str):
+    def plot_schematic(self, method_name: str, arrow_velocities: np.ndarray):
         """Plot schematic diagram with velocity arrows"""
         try:
-            fig, ax = plt.subplots(figsize=(12, 6), facecolor="#1a1a1a")
-            ax.set_facecolor("#1a1a1a")
-            ax.set_title(f"Schematic Diagram - {method_name}", color="white", pad=20)
-            ax.set_xlabel("Position across stream (20 ft interval)", color="white")
-            ax.set_ylabel("Depth (ft)", color="white")
-            ax.invert_yaxis()
-
-            positions = [i * 20 for i in range(len(self.depths))]
-            stream_bed = [min(d1, d2) for d1, d2 in self.depths]
-
-            # Plot stream bed and water area
-            ax.plot(positions, stream_bed, color="#00ffff", linewidth=2, label="Stream Bed")
-            
-            # Plot water area and velocity arrows
-            for i, ((d1, d2), x) in enumerate(zip(self.depths, positions)):
-                avg_depth = (d1 + d2) / 2
-                # Water area
-                ax.fill_between([x - 5, x + 5], 0, avg_depth, color="#005577", alpha=0.5, 
-                              label="Water Area" if i == 0 else None)
-                
-                # Velocity arrows
-                if method_name == "0.6Y Method":
-                    v1, v2 = self.velocities[i]
-                    vel = (v1 + v2) / 2
-                    color = "#ffcc00"
-                    label = "Velocity (0.6Y)" if i == 0 else None
-                elif method_name == "0.8Y/0.2Y Method":
-                    v1, v2, v3, v4 = self.velocities[i]
-                    vel = ((v1 + v3) / 2 + (v2 + v4) / 2) / 2
-                    color = "#00ffcc"
-                    label = "Velocity (0.8Y/0.2Y)" if i == 0 else None
-                else:  # Surface Velocity Method
-                    vel = st.session_state.get("surf_vel", 0)
-                    color = "#ff00ff"
-                    label = "Surface Velocity" if i == 0 else None
-
-                ax.arrow(x, avg_depth / 2, 0, -vel, head_width=2, head_length=0.5,
-                        fc=color, ec=color, label=label)
-
-            ax.grid(True, alpha=0.3)
-            legend = ax.legend(facecolor="#1a1a1a", edgecolor="#333333", fontsize=12)
-            for text in legend.get_texts():
-                text.set_color("white")
-
-            st.pyplot(fig)
-            plt.close(fig)
+            with stage("render_schematic"):
+                png = render_schematic(method_name, self.store["depth1"], self.store["depth2"], arrow_velocities)
+            with stage("st.image"):
+                st.image(png)
 
         except Exception as e:
             st.error(f"Error creating schematic: {e}")
 
-    def display_section_results(self, section_num: int, area: float, velocities: dict, section_q: float, total_q: float):
-        """Display results for a section"""
-        st.info(f"Section {section_num} Results:")
-        st.info(f"  Area: {round(area, 3)} sq ft")
-        for name, value in velocities.items():
-            st.info(f"  {name}: {round(value, 3)} ft/s")
-        st.info(f"  Section discharge: {round(section_q, 3)} cusecs")
-        st.info(f"Total discharge so far: {round(total_q, 3)} cusecs")
+    def display_results(self, result, velocities: dict, total_digits: int):
+        """Display per-section results as a single table, with the change in any edited sections"""
+        columns = {"Area (sq ft)": result.areas}
+        columns.update({f"{name} (ft/s)": value for name, value in velocities.items()})
+        columns["Section discharge (cusecs)"] = result.discharges
+        columns["Cumulative discharge (cusecs)"] = result.cumulative
+        if self.deltas:
+            # Only the edited sections changed since the last run; show by how much
+            changes = np.zeros(len(result.areas))
+            changes[[delta.index for delta in self.deltas]] = [delta.change for delta in self.deltas]
+            columns["Change (cusecs)"] = changes
+        results = pd.DataFrame(columns, index=pd.RangeIndex(1, len(result.areas) + 1, name="Section"))
+        st.dataframe(results.round(3))
+        if self.deltas:
+            change = sum(delta.change for delta in self.deltas)
+            st.caption(f"Updated {len(self.deltas)} section(s): total discharge changed by {change:+.3f} cusecs")
+        st.success(f"Total discharge: {round(result.total, total_digits)} cusecs")
+
+    def sweep_surface_parameters(self):
+        """Discharge over a grid of conversion factors and surface velocities, reusing the section area"""
+        with st.expander("Conversion factor sweep"):
+            col1, col2 = st.columns(2)
+            with col1:
+                factor_range = st.slider("Conversion factor range", 0.5, 1.0, (0.7, 0.95), key="sweep_factors")
+            with col2:
+                velocity_range = st.slider("Surface velocity range (ft/s)", 0.0, 20.0, (0.5, 5.0), key="sweep_velocities")
 
-    def calculate_0_6y_method(self, n_points: int):
+            sweep = SurfaceSweep(self.result.areas)
+            grid = sweep.grid(np.linspace(*factor_range, 26), np.linspace(*velocity_range, 46))
+            with stage("render_sweep_heatmap"):
+                st.image(render_sweep_heatmap(*grid))
+            table = pd.DataFrame(grid.discharges, index=grid.conversion_factors.round(3),
+                                 columns=grid.surface_velocities.round(2))
+            st.dataframe(table.round(2))
+
+    def calculate_0_6y_method(self, n_points: int, uploaded=None):
         """Calculate discharge using 0.6Y method"""
-        total_q = 0
         st.subheader("0.6Y Method Measurements")
-        section_areas, section_velocities, section_discharges = [], [], []
+        if not len(self.get_measurement_table("0.6Y Method", n_points, uploaded)):
+            return 0.0
 
-        for i in range(n_points):
-            st.write(f"--- Measurement Point {i+1} ---")
-            width, depth1, depth2 = self.get_measurements(i + 1)
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                vel1 = st.number_input("Velocity at 0.6Y depth, first point (ft/s)", min_value=0.0, 
-                                     key=f"06y_vel1_point{i+1}")
-            with col2:
-                vel2 = st.number_input("Velocity at 0.6Y depth, second point (ft/s)", min_value=0.0, 
-                                     key=f"06y_vel2_point{i+1}")
-
-            area = self.calc_area(width, depth1, depth2)
-            avg_velocity = (vel1 + vel2) / 2
-            section_q = area * avg_velocity
-            
-            section_areas.append(area)
-            section_velocities.append(avg_velocity)
-            section_discharges.append(section_q)
-            total_q += section_q
-
-            self.display_section_results(i+1, area, {"Average velocity": avg_velocity}, section_q, total_q)
-
-        self.areas = section_areas
-        self.velocities = [(v, v) for v in section_velocities]
-        self.discharges = [total_q]
-        self.plot_schematic("0.6Y Method")
-        return total_q
-
-    def calculate_0_8y_0_2y_method(self, n_points: int):
+        self.result = self.incremental_result("0.6Y Method")
+        avg_velocity = (self.store["vel1"] + self.store["vel2"]) / 2
+        self.display_results(self.result, {"Average velocity": avg_velocity}, 3)
+        self.plot_schematic("0.6Y Method", avg_velocity)
+        return self.result.total
+
+    def calculate_0_8y_0_2y_method(self, n_points: int, uploaded=None):
         """Calculate discharge using 0.8Y/0.2Y method"""
-        total_q = 0
         st.subheader("0.8Y/0.2Y Method Measurements")
-        section_areas, section_velocities, section_discharges = [], [], []
-
-        for i in range(n_points):
-            st.write(f"--- Measurement Point {i+1} ---")
-            width, depth1, depth2 = self.get_measurements(i + 1)
-            
-            # Get velocities at 0.8Y depth
-            st.write("Velocity measurements at 0.8Y depth:")
-            col1, col2 = st.columns(2)
-            with col1:
-                vel_08_1 = st.number_input("Velocity at 0.8Y depth, first point (ft/s)", min_value=0.0, 
-                                         key=f"08y_vel1_point{i+1}")
-            with col2:
-                vel_08_2 = st.number_input("Velocity at 0.8Y depth, second point (ft/s)", min_value=0.0, 
-                                         key=f"08y_vel2_point{i+1}")
-
-            # Get velocities at 0.2Y depth
-            st.write("Velocity measurements at 0.2Y depth:")
-            col3, col4 = st.columns(2)
-            with col3:
-                vel_02_1 = st.number_input("Velocity at 0.2Y depth, first point (ft/s)", min_value=0.0, 
-                                         key=f"02y_vel1_point{i+1}")
-            with col4:
-                vel_02_2 = st.number_input("Velocity at 0.2Y depth, second point (ft/s)", min_value=0.0, 
-                                         key=f"02y_vel2_point{i+1}")
-
-            area = self.calc_area(width, depth1, depth2)
-            avg_vel_08 = (vel_08_1 + vel_08_2) / 2
-            avg_vel_02 = (vel_02_1 + vel_02_2) / 2
-            avg_velocity = (avg_vel_08 + avg_vel_02) / 2
-            section_q = area * avg_velocity
-
-            section_areas.append(area)
-            section_velocities.append((vel_08_1, vel_08_2, vel_02_1, vel_02_2))
-            section_discharges.append(section_q)
-            total_q += section_q
-
-            self.display_section_results(i+1, area, 
-                {"Average velocity at 0.8Y": avg_vel_08, 
-                 "Average velocity at 0.2Y": avg_vel_02,
-                 "Final average velocity": avg_velocity}, 
-                section_q, total_q)
-
-        self.areas = section_areas
-        self.velocities = section_velocities
-        self.discharges = [total_q]
-        self.plot_schematic("0.8Y/0.2Y Method")
-        return total_q
-
-    def calculate_surface_velocity_method(self, n_points: int):
+        if not len(self.get_measurement_table("0.8Y/0.2Y Method", n_points, uploaded)):
+            return 0.0
+
+        self.result = self.incremental_result("0.8Y/0.2Y Method")
+        avg_vel_08 = (self.store["vel_08_1"] + self.store["vel_08_2"]) / 2
+        avg_vel_02 = (self.store["vel_02_1"] + self.store["vel_02_2"]) / 2
+        avg_velocity = (avg_vel_08 + avg_vel_02) / 2
+        self.display_results(self.result, {"Average velocity at 0.8Y": avg_vel_08,
+                                           "Average velocity at 0.2Y": avg_vel_02,
+                                           "Final average velocity": avg_velocity}, 4)
+        self.plot_schematic("0.8Y/0.2Y Method", avg_velocity)
+        return self.result.total
+
+    def calculate_surface_velocity_method(self, n_points: int, uploaded=None):
         """Calculate discharge using surface velocity method"""
         st.subheader("Surface Velocity Method Measurements")
         
@@ -202,38 +295,28 @@ class DischargeCalculator:
         with col2:
             surf_vel = st.number_input("Measured surface velocity (ft/s)", min_value=0.0, key="surf_vel")
 
-        total_q = 0
-        section_areas, section_discharges = [], []
-
-        for i in range(n_points):
-            st.write(f"--- Measurement Point {i+1} ---")
-            width, depth1, depth2 = self.get_measurements(i + 1)
-            
-            area = self.calc_area(width, depth1, depth2)
-            section_q = conv_factor * area * surf_vel
-            
-            section_areas.append(area)
-            section_discharges.append(section_q)
-            total_q += section_q
-
-            self.display_section_results(i+1, area, 
-                {"Surface velocity": surf_vel, "Conversion factor": conv_factor}, 
-                section_q, total_q)
-
-        self.areas = section_areas
-        self.velocities = [(surf_vel, surf_vel) for _ in range(n_points)]
-        self.discharges = [total_q]
-        self.plot_schematic("Surface Velocity Method")
-        return total_q
+        if not len(self.get_measurement_table("Surface Velocity Method", n_points, uploaded)):
+            return 0.0
+
+        self.result = self.incremental_result("Surface Velocity Method", conv_factor, surf_vel)
+        surface_velocities = np.full(len(self.store), surf_vel)
+        self.display_results(self.result, {"Surface velocity": surface_velocities}, 4)
+        self.plot_schematic("Surface Velocity Method", surface_velocities)
+        self.sweep_surface_parameters()
+        return self.result.total
 
 def main():
+    # Page configuration; set here rather than at import so sample4.py can reuse this app
+    st.set_page_config(page_title="Fluid Mechanics Discharge Calculator", page_icon="🌊", layout="wide")
     st.title("🌊 Fluid Mechanics Discharge Calculator")
     
     st.sidebar.header("Calculation Method")
     method = st.sidebar.radio("Select method:", 
                             ["0.6Y Method", "0.8Y/0.2Y Average Method", "Surface Velocity Method"])
     
-    n_points = st.sidebar.number_input("Number of measurement points", min_value=1, value=2)
+    n_points = st.sidebar.number_input("Number of measurement points", min_value=1, value=2,
+                                       help="Rows of the hand-entered table; an uploaded file keeps its own rows")
+    uploaded = st.sidebar.file_uploader("Upload measurements (CSV)", type="csv")
     
     calculator = DischargeCalculator()
     
@@ -245,11 +328,16 @@ def main():
         st.rerun()
 
     if method == "0.6Y Method":
-        calculator.calculate_0_6y_method(n_points)
+        calculator.calculate_0_6y_method(n_points, uploaded)
     elif method == "0.8Y/0.2Y Average Method":
-        calculator.calculate_0_8y_0_2y_method(n_points)
+        calculator.calculate_0_8y_0_2y_method(n_points, uploaded)
     else:
-        calculator.calculate_surface_velocity_method(n_points)
+        calculator.calculate_surface_velocity_method(n_points, uploaded)
+
+    if is_enabled():
+        with st.sidebar.expander("Stage timings"):
+            st.code(summary())
+            st.code(default_cache().summary())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.lines import Line2D
+
+ARROW_STYLES = {
+    "0.6Y Method": ("#ffcc00", "Velocity (0.6Y)"),
+    "0.8Y/0.2Y Method": ("#00ffcc", "Velocity (0.8Y/0.2Y)"),
+}
+SURFACE_ARROW_STYLE = ("#ff00ff", "Surface Velocity")
+POINT_SPACING = 20  # ft between plotted measurement points
+BAR_HALF_WIDTH = 5
+
+
+def decimate(positions, depths, bed, velocities, max_points: int):
+    """Bin points down to at most max_points, keeping the depth envelope"""
+    n_bins = max(int(max_points), 1)
+    edges = np.linspace(0, len(depths), n_bins + 1).astype(int)
+    starts = edges[:-1][np.diff(edges) > 0]
+    counts = np.diff(np.append(starts, len(depths)))
+    return (
+        np.add.reduceat(positions, starts) / counts,
+        np.maximum.reduceat(depths, starts),
+        np.minimum.reduceat(bed, starts),
+        np.add.reduceat(velocities, starts) / counts,
+    )
+
+
+def draw_schematic(ax, method_name: str, depths, arrow_velocities, max_points: int = None):
+    """Draw stream bed, water area and velocity arrows with one artist each
+
+    depths is a sequence of (depth1, depth2) pairs. When there are more
+    points than horizontal pixels (or max_points), points are binned so
+    the figure stays legible and renders in constant time.
+    """
+    depths = np.asarray(depths, dtype=np.float64).reshape(-1, 2)
+    velocities = np.asarray(arrow_velocities, dtype=np.float64)
+    positions = np.arange(len(depths), dtype=np.float64) * POINT_SPACING
+    avg_depths = depths.mean(axis=1)
+    stream_bed = depths.min(axis=1)
+
+    if max_points is None:
+        max_points = int(ax.get_window_extent().width)
+    half_width = BAR_HALF_WIDTH
+    if len(depths) > max_points:
+        positions, avg_depths, stream_bed, velocities = decimate(
+            positions, avg_depths, stream_bed, velocities, max_points
+        )
+        half_width = BAR_HALF_WIDTH * len(depths) / len(positions)
+
+    # Stream bed
+    ax.plot(positions, stream_bed, color="#00ffff", linewidth=2, label="Stream Bed")
+
+    # Water area: one rectangle per point in a single collection
+    left, right = positions - half_width, positions + half_width
+    zeros = np.zeros_like(avg_depths)
+    bars = np.stack(
+        [
+            np.column_stack([left, zeros]),
+            np.column_stack([left, avg_depths]),
+            np.column_stack([right, avg_depths]),
+            np.column_stack([right, zeros]),
+        ],
+        axis=1,
+    )
+    ax.add_collection(
+        PolyCollection(bars, facecolors="#005577", edgecolors="none", alpha=0.5, label="Water Area")
+    )
+
+    # Velocity arrows, drawn in data units like ax.arrow
+    color, label = ARROW_STYLES.get(method_name, SURFACE_ARROW_STYLE)
+    ax.quiver(
+        positions, avg_depths / 2, zeros, -velocities,
+        angles="xy", scale_units="xy", scale=1, color=color, width=0.003,
+    )
+    ax.update_datalim(np.column_stack([positions, avg_depths / 2 - velocities]))
+    ax.autoscale_view()
+
+    handles, _ = ax.get_legend_handles_labels()
+    handles.append(Line2D([], [], color=color, marker="^", label=label))
+    return handles
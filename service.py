@@ -0,0 +1,280 @@
+"""HTTP service for the discharge methods.
+
+    POST /discharge   one section:   {"method": "0.6Y", "width": [...], "depth1": [...], ...}
+    POST /batch       many sections: {"sections": [{...}, {...}]}
+    GET  /metrics     request counts and latency percentiles per endpoint
+    GET  /health
+
+Section payloads use the batch.py column names. Method names may be "0.6Y",
+"0.8Y/0.2Y", "surface" or the menu numbers 1-3. The surface method's
+conversion_factor and surface_velocity may be single numbers. Add
+"detail": true to get per-segment areas and discharges.
+
+Connections are kept alive (HTTP/1.1). Small requests are computed on the
+connection's thread. Batches above POOL_MIN_POINTS go to a process pool that
+is started and warmed up before the server accepts connections.
+
+    python service.py --port 8080 -j 0
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from batch import METHODS, resolve_method
+
+# Batches with at least this many points in total are sent to the process pool
+POOL_MIN_POINTS = 200_000
+MAX_BODY_BYTES = 64 * 2**20
+LATENCY_SAMPLES = 10_000
+
+
+def section_columns(method: str, section: dict):
+    """Validated kernel columns of one section payload"""
+    names = ("width", "depth1", "depth2") + METHODS[method][1]
+    try:
+        columns = [np.asarray(section[name], dtype=np.float64) for name in names]
+    except KeyError as e:
+        raise ValueError(f"Missing column {e.args[0]!r} for the {method} method")
+    except (TypeError, ValueError):
+        raise ValueError("Columns must be numbers or lists of numbers")
+    n = len(np.atleast_1d(columns[0]))
+    try:
+        columns = [np.broadcast_to(col, (n,)) for col in columns]
+    except ValueError:
+        raise ValueError("All columns must have one value per segment")
+    for name, col in zip(names, columns):
+        if not np.isfinite(col).all() or (col < 0).any():
+            raise ValueError(f"Invalid {name}: values must be finite and non-negative")
+    return columns
+
+
+def compute_section(section: dict) -> dict:
+    method = resolve_method(section.get("method", ""))
+    kernel, _, digits = METHODS[method]
+    result = kernel(*section_columns(method, section))
+    response = {key: section[key] for key in ("station", "section") if key in section}
+    response.update(
+        method=method,
+        segments=len(result.areas),
+        total_area=round(float(result.areas.sum()), digits),
+        discharge=round(result.total, digits),
+    )
+    if section.get("detail"):
+        response["areas"] = result.areas.tolist()
+        response["discharges"] = result.discharges.tolist()
+    return response
+
+
+def compute_sections(sections) -> list:
+    """Results of many sections; a bad section yields an error entry, not a failed batch"""
+    results = []
+    for section in sections:
+        try:
+            results.append(compute_section(section))
+        except (TypeError, ValueError, AttributeError) as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def section_points(section) -> int:
+    """Segments in a section payload, for sizing work; malformed sections count as one"""
+    width = section.get("width") if isinstance(section, dict) else None
+    return len(width) if isinstance(width, list) else 1
+
+
+def _warm_up(_):
+    """Run one tiny section so the worker has imported and exercised the kernels"""
+    compute_section({"method": "0.6Y", "width": [1.0], "depth1": [1.0], "depth2": [1.0], "vel1": [1.0], "vel2": [1.0]})
+    return os.getpid()
+
+
+class LatencyMetrics:
+    """Request counts and recent latencies per endpoint"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=samples))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, error: bool):
+        with self._lock:
+            self._latencies[endpoint].append(seconds * 1000)
+            self._counts[endpoint] += 1
+            self._errors[endpoint] += error
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        report = {}
+        for endpoint, values in latencies.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            report[endpoint] = {
+                "requests": counts[endpoint],
+                "errors": errors[endpoint],
+                "mean_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3),
+            }
+        return report
+
+
+class DischargeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "DischargeService/1.0"
+
+    def setup(self):
+        super().setup()
+        # Small keep-alive responses must not wait on Nagle's algorithm
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Errors are logged even when request logging is off
+        super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _timed(self, endpoint: str, handler):
+        start = time.perf_counter()
+        try:
+            status, payload = handler()
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            self.log_error("Error handling %s: %r", endpoint, e)
+            traceback.print_exc()
+            status, payload = 500, {"error": "Internal server error"}
+        self._send_json(status, payload)
+        self.server.metrics.record(endpoint, time.perf_counter() - start, status >= 400)
+
+    def _content_length(self) -> int:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a valid length the body can't be skipped, so the connection can't be reused
+            self.close_connection = True
+            raise ValueError("Invalid Content-Length header")
+        return length
+
+    def _read_json(self):
+        length = self._content_length()
+        if length > MAX_BODY_BYTES:
+            # The unread body would be taken for the next request
+            self.close_connection = True
+            raise ValueError(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.metrics.snapshot())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        if self.path == "/discharge":
+            self._timed("/discharge", self._discharge)
+        elif self.path == "/batch":
+            self._timed("/batch", self._batch)
+        else:
+            try:
+                # The body still has to be consumed to keep the connection usable
+                self.rfile.read(self._content_length())
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def _discharge(self):
+        section = self._read_json()
+        if not isinstance(section, dict):
+            raise ValueError("Expected a JSON object")
+        return 200, compute_section(section)
+
+    def _batch(self):
+        payload = self._read_json()
+        sections = payload.get("sections") if isinstance(payload, dict) else None
+        if not isinstance(sections, list):
+            raise ValueError('Expected {"sections": [...]}')
+        return 200, {"results": self.server.compute_batch(sections)}
+
+
+class DischargeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Let a burst of new keep-alive connections queue up instead of being refused
+    request_queue_size = 1024
+
+    def __init__(self, address, workers: int = 1, verbose: bool = False):
+        self.metrics = LatencyMetrics()
+        self.verbose = verbose
+        self.executor = None
+        self.workers = workers
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            # Start every worker (and its imports) now rather than on the first big batch
+            list(self.executor.map(_warm_up, range(workers)))
+        super().__init__(address, DischargeRequestHandler)
+
+    def compute_batch(self, sections) -> list:
+        points = sum(map(section_points, sections))
+        if self.executor is None or points < POOL_MIN_POINTS or len(sections) < 2:
+            return compute_sections(sections)
+        shard = -(-len(sections) // self.workers)
+        parts = [sections[i : i + shard] for i in range(0, len(sections), shard)]
+        return [result for part in self.executor.map(compute_sections, parts) for result in part]
+
+    def server_close(self):
+        super().server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Worker processes for large batches; 0 uses every core (default: 1, no pool)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = DischargeServer((args.host, args.port), args.workers or os.cpu_count() or 1, args.verbose)
+    print(f"Serving discharge calculations on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Conversion factor x surface velocity sweep for the surface velocity method.
+
+The section area does not depend on either parameter, so it is computed
+once and the whole grid is a single broadcast multiplication.
+
+    python sweep.py section.csv --factors 0.70 0.95 26 --velocities 0.5 5 46 -o sweep.csv --heatmap sweep.png
+    python sweep.py gaugings.csv --station S1 --section 2
+
+The input is one section, or a batch.py station file with --station and
+--section picking one of its sections.
+"""
+import argparse
+import csv
+import sys
+from functools import cached_property
+from typing import NamedTuple
+
+import numpy as np
+
+from batch import read_records
+from discharge_kernel import segment_areas
+
+
+class SweepResult(NamedTuple):
+    conversion_factors: np.ndarray
+    surface_velocities: np.ndarray
+    discharges: np.ndarray  # rows follow conversion_factors, columns surface_velocities
+
+    def write_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["conversion_factor"] + [f"{v:g}" for v in self.surface_velocities])
+            for factor, row in zip(self.conversion_factors, self.discharges):
+                writer.writerow([f"{factor:g}"] + [f"{q:.4f}" for q in row])
+
+
+class SurfaceSweep:
+    """Surface-method discharges of one section for many parameter pairs
+
+    Built from the segment areas, e.g. a SectionResult's areas, so an
+    already computed section is not integrated again.
+    """
+
+    def __init__(self, areas):
+        self.areas = np.asarray(areas, dtype=np.float64)
+
+    @classmethod
+    def from_section(cls, widths, depth1, depth2):
+        return cls(segment_areas(widths, depth1, depth2))
+
+    @cached_property
+    def total_area(self) -> float:
+        return float(self.areas.sum())
+
+    def discharge(self, conversion_factor, surface_velocity):
+        """Total discharge; arguments broadcast against each other like NumPy arrays"""
+        return np.asarray(conversion_factor) * self.total_area * np.asarray(surface_velocity)
+
+    def grid(self, conversion_factors, surface_velocities) -> SweepResult:
+        factors = np.asarray(conversion_factors, dtype=np.float64)
+        velocities = np.asarray(surface_velocities, dtype=np.float64)
+        return SweepResult(factors, velocities, self.discharge(factors[:, None], velocities[None, :]))
+
+    def factor_for(self, gauged_discharge, surface_velocity):
+        """Conversion factor that reproduces a current-meter discharge at a surface velocity"""
+        return np.asarray(gauged_discharge) / (self.total_area * np.asarray(surface_velocity))
+
+
+def draw_sweep_heatmap(ax, result: SweepResult):
+    """Discharge heatmap with factors on y and surface velocities on x; returns the mesh for a colorbar"""
+    mesh = ax.pcolormesh(
+        result.surface_velocities,
+        result.conversion_factors,
+        result.discharges,
+        shading="nearest",
+        cmap="viridis",
+    )
+    ax.set_xlabel("Surface velocity (ft/s)")
+    ax.set_ylabel("Conversion factor")
+    return mesh
+
+
+def parameter_range(values):
+    start, stop, num = values
+    return np.linspace(start, stop, int(num))
+
+
+def select_section(rows, station: str = None, section: str = None):
+    """Rows of the one section to sweep; station files need station and section to choose it"""
+    def key(row):
+        return str(row.get("station", "")), str(row.get("section", ""))
+
+    if station is not None or section is not None:
+        rows = [row for row in rows if (station is None or key(row)[0] == station)
+                and (section is None or key(row)[1] == section)]
+        if not rows:
+            raise ValueError(f"No rows for station {station}, section {section}")
+    sections = sorted(set(map(key, rows)))
+    if len(sections) > 1:
+        listed = ", ".join(f"{st}/{sec}" for st, sec in sections[:10])
+        more = f" and {len(sections) - 10} more" if len(sections) > 10 else ""
+        raise ValueError(
+            f"{len(sections)} sections in the file ({listed}{more}); choose one with --station and --section"
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or Excel file with width, depth1 and depth2 columns")
+    parser.add_argument("--factors", type=float, nargs=3, default=[0.7, 0.95, 26], metavar=("START", "STOP", "NUM"))
+    parser.add_argument("--velocities", type=float, nargs=3, default=[0.5, 5.0, 46], metavar=("START", "STOP", "NUM"))
+    parser.add_argument("-o", "--output", default="sweep.csv", help="Discharge table CSV")
+    parser.add_argument("--heatmap", help="Also save a heatmap (png, svg or pdf)")
+    parser.add_argument("--station", help="Station to sweep in a multi-section file")
+    parser.add_argument("--section", help="Section to sweep in a multi-section file")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = select_section(list(read_records(args.input)), args.station, args.section)
+        widths, depth1, depth2 = (np.array([float(row[col]) for row in rows]) for col in ("width", "depth1", "depth2"))
+    except (KeyError, ValueError) as e:
+        print(f"Error reading {args.input}: {e}")
+        sys.exit(1)
+
+    sweep = SurfaceSweep.from_section(widths, depth1, depth2)
+    result = sweep.grid(parameter_range(args.factors), parameter_range(args.velocities))
+    result.write_csv(args.output)
+    print(f"Area {sweep.total_area:.3f} sq ft, {result.discharges.size} discharges written to {args.output}")
+
+    if args.heatmap:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        fig.colorbar(draw_sweep_heatmap(ax, result), ax=ax, label="Discharge (cusecs)")
+        ax.set_title("Surface Velocity Method - discharge sweep")
+        fig.savefig(args.heatmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Live discharge from instrument telemetry with asyncio.
+
+Every instrument streams newline-delimited readings of one segment:
+
+    station,segment,width,depth1,depth2,<velocity columns of the station's method>
+
+Readings from all connections go through one bounded queue. When the
+aggregator falls behind, the queue fills, the readers stop reading, and TCP
+flow control slows the instruments. The aggregator drains the queue in
+batches and applies each station's batch to an IncrementalSection in one
+kernel call. Subscribers get rolling discharge updates through their own
+bounded queues; a slow subscriber drops its oldest updates and never
+stalls ingestion.
+
+    python telemetry.py --simulate 200 --duration 10
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import NamedTuple
+
+import numpy as np
+
+from batch import METHODS, resolve_method
+from incremental import IncrementalSection
+
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 1_000
+DEFAULT_WINDOW = 60.0
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Reading(NamedTuple):
+    station: str
+    segment: int
+    values: tuple  # width, depth1, depth2, then the method's velocity columns
+
+
+class DischargeUpdate(NamedTuple):
+    station: str
+    time: float
+    total: float  # discharge with the latest reading of every segment
+    rolling_mean: float  # mean total over the rolling window
+    readings: int  # readings applied in this update
+
+
+def parse_reading(line: bytes) -> Reading:
+    station, segment, *values = line.decode().strip().split(",")
+    return Reading(station, int(segment), tuple(float(v) for v in values))
+
+
+def format_reading(reading: Reading) -> bytes:
+    return (",".join([reading.station, str(reading.segment)] + [repr(float(v)) for v in reading.values]) + "\n").encode()
+
+
+class StationState:
+    """Latest segment values of one station and its recent totals"""
+
+    def __init__(self, method: str, segments: int, window: float):
+        method = resolve_method(method)
+        kernel, velocity_columns, _ = METHODS[method]
+        self.method = method
+        self.n_values = 3 + len(velocity_columns)
+        self.engine = IncrementalSection(kernel, np.zeros((self.n_values, segments)))
+        self.window = window
+        self.history = deque()  # (time, total)
+        self.history_sum = 0.0
+
+    def apply(self, readings, now: float) -> DischargeUpdate:
+        indices = [r.segment for r in readings]
+        self.engine.update_many(indices, [r.values for r in readings])
+        total = self.engine.total
+        self.history.append((now, total))
+        self.history_sum += total
+        while self.history and self.history[0][0] < now - self.window:
+            self.history_sum -= self.history.popleft()[1]
+        return DischargeUpdate(readings[0].station, now, total, self.history_sum / len(self.history), len(readings))
+
+
+class TelemetryAggregator:
+    """Consume readings in batches and publish rolling discharge per station
+
+    stations maps a station name to (method, number of segments).
+    """
+
+    def __init__(self, stations: dict, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, window: float = DEFAULT_WINDOW):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.stations = {name: StationState(method, n, window) for name, (method, n) in stations.items()}
+        self.subscribers = []
+        self.stats = defaultdict(int)
+
+    def subscribe(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=maxsize)
+        self.subscribers.append(queue)
+        return queue
+
+    def _publish(self, update: DischargeUpdate):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.stats["dropped_updates"] += 1
+            queue.put_nowait(update)
+
+    def _valid(self, reading: Reading) -> bool:
+        state = self.stations.get(reading.station)
+        return (
+            state is not None
+            and 0 <= reading.segment < len(state.engine)
+            and len(reading.values) == state.n_values
+            and all(np.isfinite(v) and v >= 0 for v in reading.values)
+        )
+
+    def process(self, batch):
+        """Apply one batch of readings, one kernel call per station"""
+        by_station = defaultdict(list)
+        for reading in batch:
+            if self._valid(reading):
+                by_station[reading.station].append(reading)
+            else:
+                self.stats["rejected"] += 1
+        now = time.monotonic()
+        for station, readings in by_station.items():
+            self._publish(self.stations[station].apply(readings, now))
+            self.stats["readings"] += len(readings)
+        self.stats["batches"] += 1
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.process(batch)
+            for _ in batch:
+                self.queue.task_done()
+            # Let the readers refill the queue between batches
+            await asyncio.sleep(0)
+
+    async def read_stream(self, reader: asyncio.StreamReader):
+        """Feed newline-delimited readings from any stream (socket, serial bridge, pipe)"""
+        while line := await reader.readline():
+            try:
+                reading = parse_reading(line)
+            except ValueError:
+                self.stats["rejected"] += 1
+                continue
+            # Waits while the queue is full, which stops reading this stream
+            await self.queue.put(reading)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        try:
+            await self.read_stream(reader)
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """Listen for instruments; returns the asyncio server (port 0 picks a free port)"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def simulated_instrument(host: str, port: int, station: str, segment: int, n_values: int,
+                               rate: float, duration: float, seed: int = 0):
+    """A fake instrument sending readings for one segment at rate Hz over a local socket"""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.5, 5.0, n_values)
+    base[0] = 20.0
+    reader, writer = await asyncio.open_connection(host, port)
+    interval = 1.0 / rate
+    deadline = time.monotonic() + duration
+    sent = 0
+    try:
+        while time.monotonic() < deadline:
+            values = base * (1 + rng.normal(0, 0.02, n_values))
+            writer.write(format_reading(Reading(station, segment, tuple(np.abs(values)))))
+            # Backpressure: waits here when the service stops reading
+            await writer.drain()
+            sent += 1
+            await asyncio.sleep(interval)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return sent
+
+
+async def run_simulation(instruments: int, segments_per_station: int, rate: float, duration: float,
+                         method: str = "0.6Y"):
+    n_stations = -(-instruments // segments_per_station)
+    stations = {f"S{i}": (method, segments_per_station) for i in range(n_stations)}
+    aggregator = TelemetryAggregator(stations)
+    updates = aggregator.subscribe()
+    server = await aggregator.serve()
+    host, port = server.sockets[0].getsockname()[:2]
+    consumer = asyncio.create_task(aggregator.run())
+
+    latest = {}
+
+    async def watch():
+        while True:
+            update = await updates.get()
+            latest[update.station] = update
+
+    watcher = asyncio.create_task(watch())
+    n_values = 3 + len(METHODS[resolve_method(method)][1])
+    started = time.monotonic()
+    sent = await asyncio.gather(*(
+        simulated_instrument(host, port, f"S{i // segments_per_station}", i % segments_per_station,
+                             n_values, rate, duration, seed=i)
+        for i in range(instruments)
+    ))
+    await aggregator.queue.join()
+    elapsed = time.monotonic() - started
+
+    for task in (consumer, watcher):
+        task.cancel()
+    while not updates.empty():
+        update = updates.get_nowait()
+        latest[update.station] = update
+    server.close()
+    await server.wait_closed()
+    return aggregator, latest, sum(sent), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simulate", type=int, default=100, metavar="INSTRUMENTS",
+                        help="Simulated instruments, one per segment (default: 100)")
+    parser.add_argument("--segments", type=int, default=10, help="Segments per station (default: 10)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Readings per second per instrument")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run")
+    parser.add_argument("--method", default="0.6Y")
+    args = parser.parse_args(argv)
+
+    aggregator, latest, sent, elapsed = asyncio.run(
+        run_simulation(args.simulate, args.segments, args.rate, args.duration, args.method)
+    )
+    stats = aggregator.stats
+    print(
+        f"{stats['connections']} instruments, {sent} readings sent, {stats['readings']} applied "
+        f"in {stats['batches']} batches ({stats['readings'] / elapsed:,.0f} readings/s), "
+        f"{stats['rejected']} rejected, {stats['dropped_updates']} updates dropped"
+    )
+    for station in sorted(latest, key=lambda s: int(s[1:]))[:10]:
+        update = latest[station]
+        print(f"{station:<6} total {update.total:>12.3f}  rolling mean {update.rolling_mean:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Monte Carlo uncertainty of measured discharge, in the spirit of ISO 748.
+
+Every width, depth and velocity reading is perturbed by its own relative
+error, the section is recomputed for each realization, and confidence
+intervals are read off the resulting distribution. A segment's second
+vertical is the next segment's first, so depth2[i] and depth1[i + 1] (and
+the matching velocities) share one error. The surface method's conversion
+factor and surface velocity apply to the whole section and get one error
+per realization.
+
+    python uncertainty.py gaugings.csv -n 200000 -j 0
+    python uncertainty.py --check
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import NamedTuple
+
+import numpy as np
+
+from batch import METHODS, read_records, resolve_method, section_key, validate_chunk
+from parallel import ordered_map
+
+DISTRIBUTIONS = ("normal", "uniform")
+DEFAULT_REALIZATIONS = 100_000
+DEFAULT_CONFIDENCE = 0.95
+# Bytes of perturbed inputs generated per task
+DEFAULT_CHUNK_BYTES = 32 * 2**20
+# Columns measured once per section rather than per vertical
+SECTION_COLUMNS = ("conversion_factor", "surface_velocity")
+
+
+class ErrorModel(NamedTuple):
+    """Relative standard uncertainty of each kind of reading (0.02 = 2 %)"""
+
+    width: float = 0.005
+    depth: float = 0.005
+    velocity: float = 0.03
+    conversion_factor: float = 0.05
+    surface_velocity: float = 0.05
+    distribution: str = "normal"
+
+    def of(self, column: str) -> float:
+        if column.startswith("depth"):
+            return self.depth
+        if column.startswith("vel"):
+            return self.velocity
+        return getattr(self, column)
+
+
+class UncertaintyResult(NamedTuple):
+    realizations: int
+    confidence: float
+    total: float  # discharge of the unperturbed readings
+    total_mean: float
+    total_std: float
+    total_low: float
+    total_high: float
+    segment_mean: np.ndarray
+    segment_std: np.ndarray
+    segment_low: np.ndarray  # normal approximation, mean -/+ z * std
+    segment_high: np.ndarray
+
+    @property
+    def relative_uncertainty(self) -> float:
+        """Half-width of the total's interval relative to the measured total"""
+        return (self.total_high - self.total_low) / 2 / self.total if self.total else float("nan")
+
+
+def _relative_errors(rng, distribution: str, sigma: float, shape):
+    if distribution == "normal":
+        return rng.standard_normal(shape) * sigma
+    if distribution == "uniform":
+        # Same standard deviation as the normal case
+        half_width = sigma * np.sqrt(3.0)
+        return rng.uniform(-half_width, half_width, shape)
+    raise ValueError(f"Unknown error distribution {distribution!r}; expected one of {DISTRIBUTIONS}")
+
+
+def simulate_chunk(task):
+    """Totals of n perturbed realizations plus per-segment running sums"""
+    method, columns, errors, seed, n = task
+    rng = np.random.default_rng(seed)
+    names = ("width", "depth1", "depth2") + METHODS[method][1]
+    n_segments = len(columns[0])
+    perturbed = {}
+    for name, col in zip(names, columns):
+        if name in perturbed:
+            continue
+        sigma = errors.of(name)
+        if name in SECTION_COLUMNS:
+            perturbed[name] = col * (1 + _relative_errors(rng, errors.distribution, sigma, (n, 1)))
+        elif name.endswith("1") and name[:-1] + "2" in names:
+            # One error per vertical: segment i ends where segment i + 1 starts
+            pair = name[:-1] + "2"
+            vertical = _relative_errors(rng, errors.distribution, sigma, (n, n_segments + 1))
+            perturbed[name] = col * (1 + vertical[:, :-1])
+            perturbed[pair] = columns[names.index(pair)] * (1 + vertical[:, 1:])
+        else:
+            perturbed[name] = col * (1 + _relative_errors(rng, errors.distribution, sigma, (n, n_segments)))
+    result = METHODS[method][0](*(perturbed[name] for name in names))
+    discharges = result.discharges
+    return result.total, discharges.sum(axis=0), (discharges**2).sum(axis=0)
+
+
+def chunk_realizations(n_segments: int, n_columns: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    return max(1, chunk_bytes // (8 * max(n_segments, 1) * (n_columns + 3)))
+
+
+def propagate(
+    method: str,
+    columns,
+    errors: ErrorModel = ErrorModel(),
+    realizations: int = DEFAULT_REALIZATIONS,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> UncertaintyResult:
+    """Confidence intervals for the total and per-segment discharge of one section
+
+    columns are the method's input columns as returned by batch.validate_chunk.
+    Realizations are generated in chunks sized to chunk_bytes, each with its
+    own SeedSequence stream, so a seed gives the same answer for any worker
+    count.
+    """
+    method = resolve_method(method)
+    columns = [np.asarray(col, dtype=np.float64) for col in columns]
+    n_segments = len(columns[0])
+    per_chunk = chunk_realizations(n_segments, len(columns), chunk_bytes)
+    sizes = [min(per_chunk, realizations - start) for start in range(0, realizations, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(method, columns, errors, s, n) for s, n in zip(seeds, sizes)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        chunks = list(map(simulate_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(ordered_map(executor, simulate_chunk, tasks, 2 * workers))
+
+    totals = np.concatenate([c[0] for c in chunks])
+    segment_sum = np.sum([c[1] for c in chunks], axis=0)
+    segment_sq = np.sum([c[2] for c in chunks], axis=0)
+    segment_mean = segment_sum / realizations
+    segment_std = np.sqrt(np.maximum(segment_sq / realizations - segment_mean**2, 0.0))
+
+    from statistics import NormalDist
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(totals, [tail, 100 - tail])
+    return UncertaintyResult(
+        realizations,
+        confidence,
+        METHODS[method][0](*columns).total,
+        float(totals.mean()),
+        float(totals.std()),
+        float(low),
+        float(high),
+        segment_mean,
+        segment_std,
+        segment_mean - z * segment_std,
+        segment_mean + z * segment_std,
+    )
+
+
+def analytic_section_std(errors: ErrorModel) -> float:
+    """Relative std of a surface-method total when only the section-wide factors are uncertain"""
+    return float(np.sqrt((1 + errors.conversion_factor**2) * (1 + errors.surface_velocity**2) - 1))
+
+
+def check_section_errors(segments=(1, 4, 40), realizations: int = 100_000, seed: int = 0, tolerance: float = 0.03):
+    """Compare simulated and analytic relative std for section-wide errors
+
+    The conversion factor and surface velocity multiply the whole section,
+    so their uncertainty must not shrink as segments are added. Returns
+    (segments, simulated, analytic) rows; raises ValueError past tolerance
+    (relative to the analytic value).
+    """
+    errors = ErrorModel(width=0.0, depth=0.0)
+    expected = analytic_section_std(errors)
+    rows = []
+    for n in segments:
+        ones = np.ones(n)
+        columns = [ones * 20.0, ones * 2.0, ones * 3.0, ones * 0.85, ones * 1.5]
+        result = propagate("surface", columns, errors, realizations, seed=seed)
+        simulated = result.total_std / result.total
+        if abs(simulated - expected) > tolerance * expected:
+            raise ValueError(
+                f"Simulated relative std {simulated:.4f} with {n} segments, expected {expected:.4f}"
+            )
+        rows.append((n, simulated, expected))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="CSV or Excel station file, as read by batch.py")
+    parser.add_argument("--check", action="store_true",
+                        help="Check the simulated spread against the analytic value and exit")
+    parser.add_argument("-n", "--realizations", type=int, default=DEFAULT_REALIZATIONS)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Worker processes (0 = all cores)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="normal")
+    for field in ErrorModel._fields[:-1]:
+        parser.add_argument(
+            f"--{field.replace('_', '-')}-error",
+            dest=field,
+            type=float,
+            default=ErrorModel._field_defaults[field],
+            help=f"Relative standard uncertainty of {field.replace('_', ' ')} readings",
+        )
+    args = parser.parse_args(argv)
+    if args.check:
+        try:
+            rows = check_section_errors(seed=args.seed)
+        except ValueError as e:
+            print(f"Check failed: {e}")
+            sys.exit(1)
+        for n, simulated, expected in rows:
+            print(f"{n:>4} segments: relative std {simulated:.4f} (analytic {expected:.4f})")
+        return
+    if args.input is None:
+        parser.error("an input file is required unless --check is given")
+    errors = ErrorModel(*(getattr(args, f) for f in ErrorModel._fields[:-1]), args.distribution)
+
+    print(f"{'Station':<10} {'Section':<10} {'Method':<10} {'Discharge':>12} {'CI low':>12} {'CI high':>12} {'U (%)':>7}")
+    try:
+        for key, rows in groupby(read_records(args.input), key=section_key):
+            method = resolve_method(key[2])
+            columns = validate_chunk(method, list(rows))
+            result = propagate(
+                method, columns, errors, args.realizations, args.confidence, args.seed, args.workers
+            )
+            print(
+                f"{key[0]:<10} {key[1]:<10} {method:<10} {result.total:>12.4f} "
+                f"{result.total_low:>12.4f} {result.total_high:>12.4f} {100 * result.relative_uncertainty:>7.2f}"
+            )
+    except (KeyError, ValueError) as e:
+        print(f"Error processing {args.input}: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Differential verification of the discharge kernel against the workbook formulas.
+
+Checks the kernel against the values stored in the reference workbook, then
+against a plain per-segment transcription of the workbook formulas over
+thousands of randomized sections, sharded across a process pool.
+
+    python verification.py --cases 100000 -j 0 --json mismatches.json
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple
+
+import numpy as np
+
+from discharge_kernel import discharge_08y02y, discharge_0_6y, discharge_surface
+from parallel import ordered_map
+
+WORKBOOK = "fm cep excel.xlsx"
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-9
+DEFAULT_CHUNK_CASES = 2_000
+
+# Sheet1 layout as rows/columns of the pandas frame (row 0 is Excel row 2)
+VERTICAL_ROWS = slice(12, 19)
+DEPTH_COL, VEL_02_COL, VEL_06_COL, VEL_08_COL = 2, 3, 4, 5
+BREADTH_CELL = (23, 2)
+SEGMENT_AREA_COL = 5
+SEGMENT_ROWS_0_6Y = slice(23, 35, 2)
+SEGMENT_ROWS_08Y02Y = slice(41, 53, 2)
+DISCHARGE_COL_0_6Y, DISCHARGE_COL_08Y02Y = 8, 11
+TOTAL_0_6Y_CELL = (35, 8)
+TOTAL_08Y02Y_CELL = (53, 11)
+SURFACE_VELOCITY_CELL, CONVERSION_FACTOR_CELL, TOTAL_SURFACE_CELL = (58, 4), (59, 4), (60, 4)
+
+
+class Mismatch(NamedTuple):
+    source: str  # "kernel" or "reference"
+    case: int  # -1 for the workbook section
+    method: str
+    quantity: str  # "area", "discharge" or "total"
+    segment: int  # -1 for section totals
+    expected: float
+    actual: float
+
+    @property
+    def abs_error(self) -> float:
+        return abs(self.actual - self.expected)
+
+    @property
+    def rel_error(self) -> float:
+        return self.abs_error / abs(self.expected) if self.expected else float("inf")
+
+
+class VerificationReport(NamedTuple):
+    cases: int
+    comparisons: int
+    mismatches: List[Mismatch]
+    max_rel_error: dict  # method -> largest relative error seen
+
+
+# --- Cases: per-vertical readings, as laid out in the workbook ---
+
+
+def workbook_case(path: str = WORKBOOK):
+    """The workbook section as a case, plus the values the workbook computed"""
+    from workbook_cache import load_workbook_arrays
+
+    values, _, _ = load_workbook_arrays(path)
+    # Bank verticals are entered as "-" and count as zero
+    verticals = np.nan_to_num(np.asarray(values[VERTICAL_ROWS]))
+    n_segments = len(verticals) - 1
+    case = {
+        "widths": np.full(n_segments, values[BREADTH_CELL]),
+        "depths": verticals[:, DEPTH_COL],
+        "vel_02": verticals[:, VEL_02_COL],
+        "vel_06": verticals[:, VEL_06_COL],
+        "vel_08": verticals[:, VEL_08_COL],
+        "conversion_factor": float(values[CONVERSION_FACTOR_CELL]),
+        "surface_velocity": float(values[SURFACE_VELOCITY_CELL]),
+    }
+    expected = {
+        "0.6Y": (
+            values[SEGMENT_ROWS_0_6Y, SEGMENT_AREA_COL],
+            values[SEGMENT_ROWS_0_6Y, DISCHARGE_COL_0_6Y],
+            values[TOTAL_0_6Y_CELL],
+        ),
+        "0.8Y/0.2Y": (
+            values[SEGMENT_ROWS_08Y02Y, SEGMENT_AREA_COL],
+            values[SEGMENT_ROWS_08Y02Y, DISCHARGE_COL_08Y02Y],
+            values[TOTAL_08Y02Y_CELL],
+        ),
+        # The workbook only gives the total for the surface method
+        "surface": (None, None, values[TOTAL_SURFACE_CELL]),
+    }
+    return case, expected
+
+
+def random_cases(rng: np.random.Generator, n_cases: int, max_verticals: int = 40):
+    """Randomized sections spanning shallow/deep, slow/fast and zero-depth banks"""
+    for _ in range(n_cases):
+        n = int(rng.integers(2, max_verticals + 1))
+        depths = rng.uniform(0.05, 20.0, n)
+        vel_02, vel_06, vel_08 = rng.uniform(0.0, 8.0, (3, n))
+        if rng.random() < 0.5:
+            for readings in (depths, vel_02, vel_06, vel_08):
+                readings[[0, -1]] = 0.0
+        yield {
+            "widths": rng.uniform(0.5, 60.0, n - 1),
+            "depths": depths,
+            "vel_02": vel_02,
+            "vel_06": vel_06,
+            "vel_08": vel_08,
+            "conversion_factor": float(rng.uniform(0.75, 0.95)),
+            "surface_velocity": float(rng.uniform(0.05, 8.0)),
+        }
+
+
+# --- Reference: the workbook formulas, one segment at a time ---
+
+
+def reference_section(case) -> dict:
+    """method -> (areas, discharges, total), following the workbook's cell formulas"""
+    d, v02, v06, v08 = case["depths"], case["vel_02"], case["vel_06"], case["vel_08"]
+    areas, q_06, q_0802 = [], [], []
+    for i, breadth in enumerate(case["widths"]):
+        area = (d[i] + d[i + 1]) / 2 * breadth
+        areas.append(area)
+        q_06.append(area * (v06[i] + v06[i + 1]) / 2)
+        # Each vertical's 0.2y/0.8y average, then the mean of the two verticals
+        q_0802.append(area * ((v02[i] + v08[i]) / 2 + (v02[i + 1] + v08[i + 1]) / 2) / 2)
+    total_area = sum(areas)
+    q_surface = [case["conversion_factor"] * a * case["surface_velocity"] for a in areas]
+    return {
+        "0.6Y": (areas, q_06, sum(q_06)),
+        "0.8Y/0.2Y": (areas, q_0802, sum(q_0802)),
+        "surface": (areas, q_surface, case["conversion_factor"] * total_area * case["surface_velocity"]),
+    }
+
+
+# --- Kernel: every case of a batch in one call per method ---
+
+
+def kernel_batch(cases) -> dict:
+    """method -> (areas, discharges, per-case totals, segment offsets) for all cases"""
+    counts = np.array([len(case["widths"]) for case in cases])
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def joined(name, part):
+        return np.concatenate([case[name][part] for case in cases])
+
+    widths = np.concatenate([case["widths"] for case in cases])
+    d1, d2 = joined("depths", np.s_[:-1]), joined("depths", np.s_[1:])
+    cf = np.repeat([case["conversion_factor"] for case in cases], counts)
+    sv = np.repeat([case["surface_velocity"] for case in cases], counts)
+
+    results = {
+        "0.6Y": discharge_0_6y(widths, d1, d2, joined("vel_06", np.s_[:-1]), joined("vel_06", np.s_[1:])),
+        "0.8Y/0.2Y": discharge_08y02y(
+            widths,
+            d1,
+            d2,
+            joined("vel_08", np.s_[:-1]),
+            joined("vel_08", np.s_[1:]),
+            joined("vel_02", np.s_[:-1]),
+            joined("vel_02", np.s_[1:]),
+        ),
+        "surface": discharge_surface(widths, d1, d2, cf, sv),
+    }
+    return {
+        method: (result.areas, result.discharges, np.add.reduceat(result.discharges, offsets[:-1]), offsets)
+        for method, result in results.items()
+    }
+
+
+# --- Comparison ---
+
+
+def _diff(source, method, quantity, expected, actual, cases, segments, rtol, atol):
+    """Mismatches of actual vs expected, where cases/segments label each element"""
+    expected = np.atleast_1d(np.asarray(expected, dtype=np.float64))
+    actual = np.atleast_1d(np.asarray(actual, dtype=np.float64))
+    bad = ~np.isclose(actual, expected, rtol=rtol, atol=atol)
+    mismatches = [
+        Mismatch(source, int(cases[i]), method, quantity, int(segments[i]), float(expected[i]), float(actual[i]))
+        for i in np.flatnonzero(bad)
+    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.abs(actual - expected) / np.abs(expected)
+    return mismatches, len(expected), float(np.nanmax(rel, initial=0.0))
+
+
+def verify_cases(cases, first_case: int = 0, rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL):
+    """Compare the kernel with the reference formulas for a batch of cases"""
+    kernel = kernel_batch(cases)
+    references = [reference_section(case) for case in cases]
+    case_ids = first_case + np.arange(len(cases))
+
+    mismatches, comparisons, max_rel = [], 0, dict.fromkeys(kernel, 0.0)
+    for method, (k_areas, k_discharges, k_totals, offsets) in kernel.items():
+        counts = np.diff(offsets)
+        segment_cases = np.repeat(case_ids, counts)
+        segments = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+        for quantity, expected, actual, labels in (
+            ("area", [a for ref in references for a in ref[method][0]], k_areas, (segment_cases, segments)),
+            ("discharge", [q for ref in references for q in ref[method][1]], k_discharges, (segment_cases, segments)),
+            ("total", [ref[method][2] for ref in references], k_totals, (case_ids, np.full(len(cases), -1))),
+        ):
+            found, n, rel = _diff("kernel", method, quantity, expected, actual, *labels, rtol, atol)
+            mismatches.extend(found)
+            comparisons += n
+            max_rel[method] = max(max_rel[method], rel)
+    return VerificationReport(len(cases), comparisons, mismatches, max_rel)
+
+
+def verify_chunk(task):
+    """Generate and verify one shard of random cases from its own seed stream"""
+    seed, first_case, n_cases, rtol, atol = task
+    cases = list(random_cases(np.random.default_rng(seed), n_cases))
+    return verify_cases(cases, first_case, rtol, atol)
+
+
+def merge_reports(reports) -> VerificationReport:
+    cases, comparisons, mismatches, max_rel = 0, 0, [], {}
+    for report in reports:
+        cases += report.cases
+        comparisons += report.comparisons
+        mismatches.extend(report.mismatches)
+        for method, rel in report.max_rel_error.items():
+            max_rel[method] = max(max_rel.get(method, 0.0), rel)
+    return VerificationReport(cases, comparisons, mismatches, max_rel)
+
+
+def verify_random(
+    n_cases: int,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_cases: int = DEFAULT_CHUNK_CASES,
+    rtol: float = DEFAULT_RTOL,
+    atol: float = DEFAULT_ATOL,
+) -> VerificationReport:
+    """Verify n_cases random sections; the same seed gives the same cases for any worker count"""
+    starts = range(0, n_cases, chunk_cases)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [(s, start, min(chunk_cases, n_cases - start), rtol, atol) for s, start in zip(seeds, starts)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return merge_reports(map(verify_chunk, tasks))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge_reports(ordered_map(executor, verify_chunk, tasks, 2 * workers))
+
+
+def verify_workbook(path: str = WORKBOOK, rtol: float = DEFAULT_RTOL, atol: float = 1e-6) -> VerificationReport:
+    """Check both the kernel and the reference formulas against the workbook's own values"""
+    case, expected = workbook_case(path)
+    kernel = {method: (a, q, t) for method, (a, q, t, _) in kernel_batch([case]).items()}
+    reference = reference_section(case)
+
+    mismatches, comparisons, max_rel = [], 0, dict.fromkeys(expected, 0.0)
+    for source, computed in (("kernel", kernel), ("reference", reference)):
+        for method, workbook_values in expected.items():
+            for quantity, wanted, actual in zip(("area", "discharge", "total"), workbook_values, computed[method]):
+                if wanted is None:
+                    continue
+                n_values = np.size(wanted)
+                segments = np.arange(n_values) if quantity != "total" else [-1]
+                found, n, rel = _diff(source, method, quantity, wanted, actual, [-1] * n_values, segments, rtol, atol)
+                mismatches.extend(found)
+                comparisons += n
+                max_rel[method] = max(max_rel[method], rel)
+    return VerificationReport(1, comparisons, mismatches, max_rel)
+
+
+def format_diff(mismatches: List[Mismatch], limit: int = 20) -> str:
+    lines = [
+        f"{'Source':<10} {'Case':>7} {'Method':<10} {'Quantity':<10} {'Seg':>4} "
+        f"{'Expected':>16} {'Actual':>16} {'Rel error':>10}"
+    ]
+    for m in mismatches[:limit]:
+        lines.append(
+            f"{m.source:<10} {m.case:>7} {m.method:<10} {m.quantity:<10} {m.segment:>4} "
+            f"{m.expected:>16.6f} {m.actual:>16.6f} {m.rel_error:>10.2e}"
+        )
+    if len(mismatches) > limit:
+        lines.append(f"... {len(mismatches) - limit} more")
+    return "\n".join(lines)
+
+
+def print_report(title: str, report: VerificationReport):
+    print(f"{title}: {report.cases} cases, {report.comparisons} comparisons, {len(report.mismatches)} mismatches")
+    for method, rel in report.max_rel_error.items():
+        print(f"  {method:<10} max relative error {rel:.2e}")
+    if report.mismatches:
+        print(format_diff(report.mismatches))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=10_000, help="Random sections to verify")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Worker processes (0 = all cores)")
+    parser.add_argument("--chunk-cases", type=int, default=DEFAULT_CHUNK_CASES, help="Cases per worker task")
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL)
+    parser.add_argument("--atol", type=float, default=DEFAULT_ATOL)
+    parser.add_argument("--workbook", default=WORKBOOK, help="Reference workbook ('' to skip)")
+    parser.add_argument("--json", help="Write every mismatch to this JSON file")
+    args = parser.parse_args(argv)
+
+    reports = []
+    if args.workbook:
+        reports.append(verify_workbook(args.workbook, args.rtol))
+        print_report("Workbook", reports[-1])
+    reports.append(verify_random(args.cases, args.seed, args.workers, args.chunk_cases, args.rtol, args.atol))
+    print_report("Random", reports[-1])
+
+    mismatches = [m for report in reports for m in report.mismatches]
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([dict(m._asdict(), abs_error=m.abs_error, rel_error=m.rel_error) for m in mismatches], f, indent=2)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR = ".workbook_cache"
+CACHE_VERSION = 2
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path: str, sheet_name=0, cache_dir: str = CACHE_DIR) -> str:
+    """Directory holding the converted copy of one workbook sheet"""
+    source = os.path.abspath(path)
+    key = hashlib.sha256(f"{source}\0{sheet_name}".encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    return os.path.join(cache_dir, f"{stem}-{key}")
+
+
+def _read_manifest(folder: str):
+    try:
+        with open(os.path.join(folder, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def _write_manifest(folder: str, manifest: dict):
+    tmp = os.path.join(folder, "manifest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(folder, "manifest.json"))
+
+
+def _is_fresh(path: str, folder: str) -> bool:
+    """Cheap mtime/size check first; fall back to the content hash"""
+    manifest = _read_manifest(folder)
+    if manifest is None:
+        return False
+    stat = os.stat(path)
+    if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return True
+    if manifest["sha256"] != file_sha256(path):
+        return False
+    # Touched but unchanged: remember the new mtime so the hash isn't recomputed
+    manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    _write_manifest(folder, manifest)
+    return True
+
+
+def convert_workbook(path: str, sheet_name=0, cache_dir: str = CACHE_DIR) -> str:
+    """Parse a workbook sheet once and store it as a numeric .npy plus text cells"""
+    import pandas as pd
+
+    df = pd.read_excel(path, sheet_name=sheet_name)
+    cells = df.to_numpy(dtype=object)
+    numeric = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    # Text that looks like a number (e.g. a method code "2") stays text
+    numeric[np.frompyfunc(lambda value: isinstance(value, str), 1, 1)(cells).astype(bool)] = np.nan
+    text = {
+        f"{row},{col}": str(value)
+        for (row, col), value in np.ndenumerate(cells)
+        if np.isnan(numeric[row, col]) and not pd.isna(value)
+    }
+
+    folder = cache_path(path, sheet_name, cache_dir)
+    os.makedirs(folder, exist_ok=True)
+    np.save(os.path.join(folder, "values.npy"), numeric)
+    with open(os.path.join(folder, "text.json"), "w") as f:
+        json.dump(text, f)
+    stat = os.stat(path)
+    _write_manifest(
+        folder,
+        {
+            "version": CACHE_VERSION,
+            "source": os.path.abspath(path),
+            "sheet_name": sheet_name,
+            "sha256": file_sha256(path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "columns": [str(c) for c in df.columns],
+            "dtypes": [str(dtype) for dtype in df.dtypes],
+        },
+    )
+    return folder
+
+
+def _load(path: str, sheet_name, cache_dir: str):
+    folder = cache_path(path, sheet_name, cache_dir)
+    if not _is_fresh(path, folder):
+        folder = convert_workbook(path, sheet_name, cache_dir)
+    values = np.load(os.path.join(folder, "values.npy"), mmap_mode="r")
+    with open(os.path.join(folder, "text.json")) as f:
+        text = {tuple(map(int, key.split(","))): value for key, value in json.load(f).items()}
+    return values, text, _read_manifest(folder)
+
+
+def load_workbook_arrays(path: str, sheet_name=0, cache_dir: str = CACHE_DIR):
+    """Memory-mapped numeric cells (NaN where not a number), text cells and column labels
+
+    The workbook is only parsed when the cache is missing or stale.
+    """
+    values, text, manifest = _load(path, sheet_name, cache_dir)
+    return values, text, manifest["columns"]
+
+
+def load_workbook_frame(path: str, sheet_name=0, cache_dir: str = CACHE_DIR):
+    """Drop-in for pd.read_excel(path) backed by the columnar cache
+
+    Columns get back the dtypes pd.read_excel gave them; numeric columns
+    are taken straight from the cached array.
+    """
+    import pandas as pd
+
+    values, text, manifest = _load(path, sheet_name, cache_dir)
+    text_columns = {col for _, col in text}
+    frame = pd.DataFrame(index=pd.RangeIndex(len(values)))
+    for i, (name, dtype) in enumerate(zip(manifest["columns"], manifest["dtypes"])):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if dtype.kind in "iufb" and i not in text_columns:
+            column = pd.Series(values[:, i].astype(dtype))
+        else:
+            cells = values[:, i].astype(object)
+            cells[np.isnan(values[:, i])] = np.nan
+            for (row, col), value in text.items():
+                if col == i:
+                    cells[row] = value
+            column = pd.Series(cells)
+            try:
+                column = column.astype(dtype)
+            except (TypeError, ValueError):
+                column = column.infer_objects()
+        frame.insert(i, name, column, allow_duplicates=True)
+    return frame